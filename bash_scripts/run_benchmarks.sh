@@ -0,0 +1,11 @@
+#!/usr/bin/env bash
+corpus="bench_data"
+files=200
+latency=0.0
+results="bench_results.json"
+
+python3 benchmarks/generate_corpus.py $corpus --files $files
+echo "corpus created"
+python3 benchmarks/run_benchmarks.py $corpus --latency $latency --output $results $@
+python3 benchmarks/startup_benchmark.py
+python3 benchmarks/extractor_benchmark.py $corpus
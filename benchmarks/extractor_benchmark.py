@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compares the extractors of entity_extractors.py with cmdi_extractor.get_names_with_ids on a corpus (see
+generate_corpus.py): the time needed to extract the names and VIAF IDs of all tags in namespaces_tags.csv, and
+the number of (CMDI, tag) results that differ. Every registered kind of extractor is applied to all tags, as well
+as the kinds configured in the namespaces_tags.csv.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.append(os.path.join(REPOSITORY_DIR, "python_scripts"))
+
+from cmdi_extractor import read_cmdi, get_names_with_ids, get_namespace, tag_list, tag_extractors
+from entity_extractors import EXTRACTOR_KINDS, get_extractor
+from run_benchmarks import cmdi_paths
+
+
+def extract_all(cmdis, tags, function):
+    """
+    Runs 'function' for every CMDI and every tag
+    :return: a list with the results, in the order of cmdis and tags
+    """
+    results = []
+    for cmdi in cmdis:
+        for prefix, tag in tags:
+            namespace = get_namespace(cmdi, prefix)
+            if namespace is not None:
+                results.append(function(cmdi, prefix, namespace, tag))
+    return results
+
+
+def timed(cmdis, tags, function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # get_names_with_ids prints every VIAF ID it finds
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = extract_all(cmdis, tags, function)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, results
+
+
+def run(args):
+    cmdis = [read_cmdi(path) for path in cmdi_paths(os.path.join(args.corpus, "cmdis"))]
+    tags = [(prefix, tag) for prefix, tag, _ in tag_list(args.namespace_tag_list)]
+    kinds = tag_extractors(args.namespace_tag_list)
+
+    def legacy(cmdi, prefix, namespace, tag):
+        return get_names_with_ids(cmdi, namespace, tag, args.authoritative_tag)
+
+    def registry(kind):
+        def extract(cmdi, prefix, namespace, tag):
+            return get_extractor(kind or kinds[(prefix, tag)], namespace, tag, args.authoritative_tag).extract(cmdi)
+        return extract
+
+    legacy_seconds, legacy_results = timed(cmdis, tags, legacy, args.repeat)
+    report = {"files": len(cmdis), "tags": ["%s:%s" % tag for tag in tags],
+              "results": [{"extractor": "get_names_with_ids", "seconds": round(legacy_seconds, 4),
+                           "files_per_second": round(len(cmdis) / legacy_seconds, 2)}]}
+    # 'generic' has to give exactly the same results as get_names_with_ids, the other kinds find other names
+    for label, kind in [(kind, kind) for kind in sorted(EXTRACTOR_KINDS)] + [("namespaces_tags.csv", None)]:
+        seconds, results = timed(cmdis, tags, registry(kind), args.repeat)
+        report["results"].append({"extractor": label, "seconds": round(seconds, 4),
+                                  "files_per_second": round(len(cmdis) / seconds, 2),
+                                  "speedup": round(legacy_seconds / seconds, 2),
+                                  "differences": sum(1 for a, b in zip(legacy_results, results) if a != b)})
+    with open(args.output, "w", encoding="utf-8") as out_f:
+        json.dump(report, out_f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", type=str, help="the directory written by generate_corpus.py")
+    parser.add_argument("--output", type=str, default="bench_extractors.json",
+                        help="the JSON file the results are written to")
+    parser.add_argument("--namespace_tag_list", type=str,
+                        default=os.path.join(REPOSITORY_DIR, "namespaces_tags.csv"))
+    parser.add_argument("--authoritative_tag", type=str, default="AuthoritativeID")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of this many runs is reported")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args), indent=2))
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Generates a synthetic CMDI corpus together with matching recorded VIAF responses for viaf_stub.py. The output
+directory contains
+
+    cmdis/                  the CMDI files (in subdirectories, like a harvested collection)
+    responses/              the recorded VIAF answers for every name that appears in the corpus
+    viaf_clusters.lines.gz  the same clusters in the line format of the VIAF dump (for viaf_dump.py)
+
+The same arguments and seed always produce the same corpus.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import unicodedata
+
+from lxml import etree as ET
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python_scripts"))
+
+from cmdi_extractor import tag_list
+from viaf_stub import response_key
+
+CMD_NAMESPACE = "http://www.clarin.eu/cmd/1"
+PROFILE_NAMESPACE = "http://www.clarin.eu/cmd/1/profiles/clarin.eu:cr1:p_1527668176128"
+VIAF_TERMS = "http://viaf.org/viaf/terms#"
+SRW = "http://www.loc.gov/zing/srw/"
+
+FIRST_NAMES = ["Erhard", "Marie", "Heike", "Yannick", "Thorsten", "Emanuel", "Jürgen", "Zoë", "Søren", "Anaïs",
+               "Łukasz", "José", "Ingrid", "Chen", "Olga", "Ahmet", "Ljubica", "Maëlle", "François", "Kerstin"]
+LAST_NAMES = ["Hinrichs", "Zinsmeister", "Versley", "Trippel", "Dima", "Müller", "Ødegård", "Çelik", "Nowak",
+              "García", "Dvořák", "Schäfer", "Kühn", "Lindqvist", "Petrović", "Wang", "Ivanova", "Öztürk"]
+ORGANISATION_PARTS = ["Universität", "Institut", "Zentrum", "Seminar", "Akademie", "Forschungsstelle"]
+ORGANISATION_TOPICS = ["Sprachwissenschaft", "Computerlinguistik", "Germanistik", "Phonetik", "Lexikographie",
+                       "Korpuslinguistik", "Dialektologie", "Informatik"]
+ORGANISATION_PLACES = ["Tübingen", "Leipzig", "Mannheim", "Zürich", "Wien", "Kraków", "Praha", "Göteborg"]
+NATIONS = ["DE", "AT", "CH", "PL", "CZ", "SE", "FR", "US"]
+
+
+def make_name(rnd, entity_type):
+    """
+    Returns a random (first, last) name for persons or (name, None) for organisations
+    """
+    if entity_type == "Personal":
+        return rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+    return "%s für %s %s" % (rnd.choice(ORGANISATION_PARTS), rnd.choice(ORGANISATION_TOPICS),
+                            rnd.choice(ORGANISATION_PLACES)), None
+
+
+class Entity:
+    def __init__(self, entity_type, first, last, viaf_ids):
+        self.entity_type = entity_type  # Personal or Corporate
+        self.first = first  # str, the first name or the full name of an organisation
+        self.last = last  # str or None for organisations
+        self.viaf_ids = viaf_ids  # list of candidate ids, the first one is the 'right' one
+
+    @property
+    def name(self):
+        if self.last is None:
+            return self.first
+        return self.first + " " + self.last
+
+    @property
+    def heading(self):
+        # VIAF main headings put the family name first and often append the life dates
+        if self.last is None:
+            return self.first
+        return "%s, %s, %d-" % (self.last, self.first, 1930 + int(self.viaf_ids[0]) % 60)
+
+
+def make_pool(rnd, tags, unique_names, max_candidates):
+    """
+    Creates the distinct entities that the corpus draws from, separately for every entity type
+    """
+    pool = {}
+    next_id = 10000000
+    for entity_type in sorted({entity_type for _, _, entity_type in tags}):
+        entities = {}
+        attempts = 0
+        while len(entities) < unique_names and attempts < unique_names * 50:
+            attempts += 1
+            first, last = make_name(rnd, entity_type)
+            entity = Entity(entity_type, first, last, [])
+            if entity.name in entities:
+                continue
+            for _ in range(rnd.randint(1, max_candidates)):
+                entity.viaf_ids.append(str(next_id))
+                next_id += rnd.randint(1, 9973)
+            entities[entity.name] = entity
+        pool[entity_type] = list(entities.values())
+    return pool
+
+
+def variant(rnd, entity):
+    """
+    Returns a variant spelling of the name of an entity, as it appears in CMDIs from different sources
+    """
+    if entity.last is not None and rnd.random() < 0.5:
+        return "%s, %s" % (entity.last, entity.first)
+    if rnd.random() < 0.5:
+        return unicodedata.normalize("NFD", entity.name)
+    return entity.name.replace(" ", "  ", 1)
+
+
+def add_name(node, namespace, entity, layout_ratio, rnd):
+    """
+    Adds the children with the name of an entity; with the probability 'layout_ratio' they are laid out differently
+    than usual, e.g. the family name comes first, there is a middle name or a department, or an organisation has only
+    a short name
+    """
+    def child(tag, text):
+        ET.SubElement(node, "{%s}%s" % (namespace, tag)).text = text
+
+    layout = rnd.randrange(3) if rnd.random() < layout_ratio else None
+    if entity.last is not None:
+        if layout == 0:
+            child("lastName", entity.last)
+            child("firstName", entity.first)
+            return
+        child("firstName", entity.first)
+        if layout == 1:
+            child("middleName", rnd.choice(FIRST_NAMES)[0] + ".")
+        child("lastName", entity.last)
+        if layout == 2:
+            # not part of the name
+            child("title", rnd.choice(["Dr.", "Prof."]))
+    elif layout == 0:
+        child("name", entity.name)
+        child("departmentName", "Abteilung " + rnd.choice(ORGANISATION_TOPICS))
+    elif layout == 1:
+        child("OrganisationShortName", "".join(word[0] for word in entity.name.split() if word[0].isupper()))
+    elif layout == 2:
+        child("name", entity.name)
+        child("fundingAgency", entity.name)
+    else:
+        child("name", entity.name)
+
+
+def add_entity(parent, namespace, tag, entity, viaf_ratio, variant_ratio, layout_ratio, authoritative_tag, rnd):
+    node = ET.SubElement(parent, "{%s}%s" % (namespace, tag))
+    if rnd.random() < variant_ratio:
+        ET.SubElement(node, "{%s}name" % namespace).text = variant(rnd, entity)
+    elif entity.last is None and rnd.random() < 0.5:
+        # the name is the content of the element itself
+        node.text = entity.name
+        return
+    else:
+        add_name(node, namespace, entity, layout_ratio, rnd)
+    if rnd.random() < viaf_ratio:
+        authorities = ET.SubElement(node, "{%s}%ss" % (namespace, authoritative_tag))
+        authority = ET.SubElement(authorities, "{%s}%s" % (namespace, authoritative_tag))
+        ET.SubElement(authority, "{%s}id" % namespace).text = "http://viaf.org/viaf/" + entity.viaf_ids[0]
+        ET.SubElement(authority, "{%s}issuingAuthority" % namespace).text = "VIAF"
+
+
+def make_cmdi(rnd, tags, weights, pool, density, viaf_ratio, variant_ratio, layout_ratio, default_ns_ratio,
+              authoritative_tag):
+    """
+    Creates one CMDI record with (on average) 'density' entities, the tags are drawn according to 'weights'
+    """
+    if rnd.random() < default_ns_ratio:
+        # the profile namespace is the default namespace, the lookup by prefix has to fall back to it
+        nsmap = {None: PROFILE_NAMESPACE, "cmd": CMD_NAMESPACE}
+    else:
+        nsmap = {"cmd": CMD_NAMESPACE, "cmdp": PROFILE_NAMESPACE}
+    root = ET.Element("{%s}CMD" % CMD_NAMESPACE, nsmap=nsmap, CMDVersion="1.2")
+    ET.SubElement(root, "{%s}Header" % CMD_NAMESPACE)
+    ET.SubElement(root, "{%s}Resources" % CMD_NAMESPACE)
+    components = ET.SubElement(root, "{%s}Components" % CMD_NAMESPACE)
+    profile = ET.SubElement(components, "{%s}BiodataProfile" % PROFILE_NAMESPACE)
+    ET.SubElement(profile, "{%s}Title" % PROFILE_NAMESPACE).text = "Synthetic record %d" % rnd.randint(0, 10 ** 6)
+    count = max(0, int(round(rnd.gauss(density, density / 3.0))))
+    for _ in range(count):
+        _, tag, entity_type = rnd.choices(tags, weights=weights)[0]
+        entity = rnd.choice(pool[entity_type])
+        add_entity(profile, PROFILE_NAMESPACE, tag, entity, viaf_ratio, variant_ratio, layout_ratio, authoritative_tag,
+                   rnd)
+    return root
+
+
+def cluster_xml(entity, viaf_id, rnd):
+    root = ET.Element("{%s}VIAFCluster" % VIAF_TERMS, nsmap={"ns2": VIAF_TERMS})
+    ET.SubElement(root, "{%s}viafID" % VIAF_TERMS).text = viaf_id
+    ET.SubElement(root, "{%s}nameType" % VIAF_TERMS).text = entity.entity_type
+    if entity.last is None:
+        ET.SubElement(root, "{%s}birthDate" % VIAF_TERMS).text = "0"
+    else:
+        ET.SubElement(root, "{%s}birthDate" % VIAF_TERMS).text = "%d-%02d-%02d" % (
+            1930 + int(viaf_id) % 60, rnd.randint(1, 12), rnd.randint(1, 28))
+    nationalities = ET.SubElement(root, "{%s}nationalityOfEntity" % VIAF_TERMS)
+    for nation in rnd.sample(NATIONS, rnd.randint(1, 2)):
+        data = ET.SubElement(nationalities, "{%s}data" % VIAF_TERMS)
+        ET.SubElement(data, "{%s}text" % VIAF_TERMS).text = nation
+    links = ET.SubElement(root, "{%s}xLinks" % VIAF_TERMS)
+    if rnd.random() < 0.5:
+        ET.SubElement(links, "{%s}xLink" % VIAF_TERMS, type="Wikipedia").text = \
+            "https://de.wikipedia.org/wiki/" + entity.name.replace(" ", "_")
+    ET.SubElement(root, "{%s}mainHeadings" % VIAF_TERMS).append(heading_data(entity.heading))
+    return root
+
+
+def heading_data(heading):
+    data = ET.Element("{%s}data" % VIAF_TERMS)
+    ET.SubElement(data, "{%s}text" % VIAF_TERMS).text = heading
+    return data
+
+
+def sru_xml(entity, with_x400):
+    """
+    The SRU answer listing all candidate clusters of an entity, 'with_x400' adds the alternative name forms that
+    are used by the 'local.names' search
+    """
+    root = ET.Element("{%s}searchRetrieveResponse" % SRW, nsmap={None: SRW})
+    ET.SubElement(root, "{%s}version" % SRW).text = "1.1"
+    ET.SubElement(root, "{%s}numberOfRecords" % SRW).text = str(len(entity.viaf_ids))
+    records = ET.SubElement(root, "{%s}records" % SRW)
+    for viaf_id in entity.viaf_ids:
+        record = ET.SubElement(records, "{%s}record" % SRW)
+        ET.SubElement(record, "{%s}recordSchema" % SRW).text = "http://viaf.org/BriefVIAFCluster"
+        data = ET.SubElement(record, "{%s}recordData" % SRW)
+        cluster = ET.SubElement(data, "{%s}VIAFCluster" % VIAF_TERMS, nsmap={"ns2": VIAF_TERMS})
+        ET.SubElement(cluster, "{%s}viafID" % VIAF_TERMS).text = viaf_id
+        ET.SubElement(cluster, "{%s}nameType" % VIAF_TERMS).text = entity.entity_type
+        ET.SubElement(cluster, "{%s}mainHeadings" % VIAF_TERMS).append(heading_data(entity.heading))
+        if with_x400:
+            x400s = ET.SubElement(cluster, "{%s}x400s" % VIAF_TERMS)
+            x400 = ET.SubElement(x400s, "{%s}x400" % VIAF_TERMS)
+            datafield = ET.SubElement(x400, "{%s}datafield" % VIAF_TERMS)
+            ET.SubElement(datafield, "{%s}subfield" % VIAF_TERMS, code="a").text = entity.heading
+    return root
+
+
+def autosuggest_json(entity):
+    return {"query": entity.name,
+            "result": [{"term": entity.heading, "displayForm": entity.heading,
+                        "nametype": entity.entity_type.lower(), "viafid": viaf_id} for viaf_id in entity.viaf_ids]}
+
+
+def write_xml(tree, path):
+    with open(path, "wb") as out_f:
+        out_f.write(ET.tostring(tree, xml_declaration=True, encoding="utf-8", pretty_print=True))
+
+
+def write_responses(pool, responses_dir, dump_path, autosuggest_ratio, rnd):
+    """
+    Stores the recorded VIAF answers for all entities of the pool and a dump with all clusters. For a share of
+    'autosuggest_ratio' of the entities the main heading search finds nothing, so that the AutoSuggest fallback is
+    exercised.
+    """
+    dump = gzip.open(dump_path, "wt", encoding="utf-8")
+    for folder in ["search", "names", "autosuggest", "cluster"]:
+        os.makedirs(os.path.join(responses_dir, folder), exist_ok=True)
+    for entities in pool.values():
+        for entity in entities:
+            key = response_key(entity.name)
+            if rnd.random() >= autosuggest_ratio:
+                write_xml(sru_xml(entity, with_x400=False), os.path.join(responses_dir, "search", key + ".xml"))
+            with open(os.path.join(responses_dir, "autosuggest", key + ".json"), "w", encoding="utf-8") as out_f:
+                json.dump(autosuggest_json(entity), out_f, ensure_ascii=False)
+            write_xml(sru_xml(entity, with_x400=True), os.path.join(responses_dir, "names", key + ".xml"))
+            for viaf_id in entity.viaf_ids:
+                cluster = cluster_xml(entity, viaf_id, rnd)
+                write_xml(cluster, os.path.join(responses_dir, "cluster", viaf_id + ".xml"))
+                dump.write(viaf_id + "\t" + ET.tostring(cluster, encoding="unicode") + "\n")
+    dump.close()
+
+
+def generate(output, files, density, unique_names, viaf_ratio, namespace_tag_list, namespace_mix=None,
+             variant_ratio=0.1, layout_ratio=0.2, default_ns_ratio=0.1, autosuggest_ratio=0.2, max_candidates=3,
+             files_per_dir=100, authoritative_tag="AuthoritativeID", seed=0):
+    """
+    Writes a synthetic corpus and its recorded VIAF responses to 'output'
+    :param output: the directory that will contain 'cmdis' and 'responses'
+    :param files: the number of CMDI files
+    :param density: the average number of entities per CMDI file
+    :param unique_names: the number of distinct names per entity type, fewer names mean more repetitions
+    :param viaf_ratio: the share of entities that already carry a VIAF ID in the CMDI
+    :param namespace_tag_list: the CSV with namespaces, tags and entity types (e.g. namespaces_tags.csv)
+    :param namespace_mix: a list with one weight per line of the namespace_tag_list, None for equal weights
+    :param variant_ratio: the share of entities that are spelled differently ('last, first', NFD, extra spaces)
+    :param layout_ratio: the share of entities whose name children are laid out differently (see add_name)
+    :param default_ns_ratio: the share of files in which the profile namespace has no prefix
+    :param autosuggest_ratio: the share of names that are only found by AutoSuggest
+    :param max_candidates: the maximal number of candidate VIAF clusters per name
+    :param files_per_dir: the number of CMDI files per subdirectory
+    :param authoritative_tag: the tag for authority files (e.g. 'AuthoritativeID')
+    :param seed: the random seed
+    :return: a dict summarising the corpus
+    """
+    rnd = random.Random(seed)
+    tags = tag_list(namespace_tag_list)
+    weights = namespace_mix or [1] * len(tags)
+    if len(weights) != len(tags):
+        raise ValueError("namespace_mix needs one weight for each of the %d lines in %s" %
+                         (len(tags), namespace_tag_list))
+    pool = make_pool(rnd, tags, unique_names, max_candidates)
+
+    cmdi_dir = os.path.join(output, "cmdis")
+    for i in range(files):
+        subdir = os.path.join(cmdi_dir, "%04d" % (i // files_per_dir))
+        os.makedirs(subdir, exist_ok=True)
+        cmdi = make_cmdi(rnd, tags, weights, pool, density, viaf_ratio, variant_ratio, layout_ratio, default_ns_ratio,
+                         authoritative_tag)
+        write_xml(cmdi, os.path.join(subdir, "record_%06d.xml" % i))
+    write_responses(pool, os.path.join(output, "responses"), os.path.join(output, "viaf_clusters.lines.gz"),
+                    autosuggest_ratio, rnd)
+
+    summary = {"files": files, "density": density, "unique_names": unique_names, "viaf_ratio": viaf_ratio,
+               "namespace_mix": weights, "variant_ratio": variant_ratio, "layout_ratio": layout_ratio,
+               "default_ns_ratio": default_ns_ratio,
+               "autosuggest_ratio": autosuggest_ratio, "seed": seed,
+               "entities": {entity_type: len(entities) for entity_type, entities in pool.items()}}
+    with open(os.path.join(output, "corpus.json"), "w", encoding="utf-8") as out_f:
+        json.dump(summary, out_f, indent=2)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", type=str, help="the directory for the corpus and the recorded responses")
+    parser.add_argument("--files", type=int, default=200, help="the number of CMDI files")
+    parser.add_argument("--density", type=float, default=5, help="the average number of entities per CMDI file")
+    parser.add_argument("--unique_names", type=int, default=100,
+                        help="the number of distinct names per entity type")
+    parser.add_argument("--viaf_ratio", type=float, default=0.2,
+                        help="the share of entities that already have a VIAF ID in the CMDI")
+    parser.add_argument("--namespace_tag_list", type=str, default="namespaces_tags.csv",
+                        help="a CSV containing namespaces, tags and entity types")
+    parser.add_argument("--namespace_mix", type=float, nargs="+", default=None,
+                        help="one weight for each line of the namespace_tag_list")
+    parser.add_argument("--variant_ratio", type=float, default=0.1,
+                        help="the share of entities with a variant spelling of their name")
+    parser.add_argument("--layout_ratio", type=float, default=0.2,
+                        help="the share of entities whose name children are in another order or have other tags")
+    parser.add_argument("--default_ns_ratio", type=float, default=0.1,
+                        help="the share of files where the profile namespace is the default namespace")
+    parser.add_argument("--autosuggest_ratio", type=float, default=0.2,
+                        help="the share of names that are only found with AutoSuggest")
+    parser.add_argument("--max_candidates", type=int, default=3, help="the maximal number of VIAF clusters per name")
+    parser.add_argument("--authoritative_tag", type=str, default="AuthoritativeID")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    summary = generate(args.output, args.files, args.density, args.unique_names, args.viaf_ratio,
+                       args.namespace_tag_list, namespace_mix=args.namespace_mix, variant_ratio=args.variant_ratio,
+                       layout_ratio=args.layout_ratio, default_ns_ratio=args.default_ns_ratio, autosuggest_ratio=args.autosuggest_ratio,
+                       max_candidates=args.max_candidates, authoritative_tag=args.authoritative_tag, seed=args.seed)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Runs the benchmark scenarios against a synthetic corpus (see generate_corpus.py) and a stub VIAF server (see
+viaf_stub.py) and writes throughput and peak memory of every scenario to a JSON file.
+
+Scenarios:
+    cold    build a new cache from all CMDIs, every name has to be looked up at VIAF
+    warm    run the cache building again on the cache written by 'cold', ideally without any VIAF request
+    update  add the IDs from the cache to all CMDIs (update_cmdi.py)
+    webapp  POST all CMDIs to the flask app (webapp.py) with its test client
+    import  import the dump of the corpus (viaf_clusters.lines.gz) into an index (viaf_dump.py)
+    offline build a new cache from all CMDIs, resolving the names with the index instead of VIAF
+
+Every scenario runs twice, each time in a fresh python process: once to measure the time and the peak RSS of the
+process, once with tracemalloc to measure the peak of the memory allocated by python (tracing slows the scenario
+down too much to time it in the same run).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.append(os.path.join(REPOSITORY_DIR, "python_scripts"))
+
+from viaf_stub import StubVIAFServer
+
+SCENARIOS = ["cold", "warm", "update", "webapp", "import", "offline"]
+
+
+def cmdi_paths(cmdi_dir):
+    paths = []
+    for subdir, dirs, files in os.walk(cmdi_dir):
+        for file in sorted(files):
+            paths.append(os.path.join(subdir, file))
+    return sorted(paths)
+
+
+def measure(name, function, items, trace=False):
+    """
+    Runs 'function' and measures either the time and the peak RSS of the process, or (if 'trace' is set) the peak of
+    the memory allocated by python
+    :param name: the name of the scenario
+    :param function: a function without arguments, it returns the number of entries in the cache (or None)
+    :param items: the number of processed CMDI files
+    :param trace: measure the memory with tracemalloc instead of the time
+    :return: a dict with the results
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    # the scripts print a lot for every entity, this should not be measured
+    with contextlib.redirect_stdout(io.StringIO()):
+        cache_entries = function()
+    seconds = time.perf_counter() - start
+    result = {"scenario": name, "files": items}
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_traced_mb"] = round(peak / 2 ** 20, 2)
+    else:
+        result["seconds"] = round(seconds, 4)
+        result["files_per_second"] = round(items / seconds, 2) if seconds else None
+        # the process only ran this scenario, so its peak RSS is the one of the scenario (and the interpreter)
+        result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    if cache_entries is not None:
+        result["cache_entries"] = cache_entries
+    return result
+
+
+def build_cache(paths, cache_path, args, new):
+    from cmdi_extractor import create_cache, read_cmdi, cmdi_to_cache
+
+    cache = create_cache(save_path=cache_path, delimiter="\t", specification=args.specification, new=new)
+    for path in paths:
+        cmdi_to_cache(read_cmdi(path), cache, args)
+    cache.write_cache()
+    return cache.size
+
+
+def update_cmdis(paths, cache_path, output_dir, args):
+    from lxml import etree as ET
+    from cmdi_extractor import read_cmdi
+    from update_cmdi import load_cache, cache_to_cmdi
+
+    cache = load_cache(cache_path, "\t", args.specification)
+    for i, path in enumerate(paths):
+        cmdi = read_cmdi(path)
+        cache_to_cmdi(cache, cmdi, args)
+        ET.ElementTree(cmdi).write(os.path.join(output_dir, "%06d.xml" % i), pretty_print=True, encoding="utf-8")
+    return None
+
+
+def post_cmdis(paths, cache_path, args):
+    import webapp
+    from entity_cache import EntityCache
+
+    webapp.cache = EntityCache(filepath=cache_path, delimiter="\t", specification=args.specification)
+    client = webapp.app.test_client()
+    for _ in range(args.webapp_rounds):
+        for path in paths:
+            with open(path, "rb") as in_f:
+                response = client.post("/BiodataNER", data=in_f.read(), content_type="application/xml")
+            if response.status_code != 200:
+                raise RuntimeError("webapp answered %d for %s" % (response.status_code, path))
+    return None
+
+
+def import_dump(corpus, index_path):
+    from viaf_dump import import_dump
+
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    import_dump(os.path.join(corpus, "viaf_clusters.lines.gz"), index_path)
+    return None
+
+
+def build_cache_offline(paths, cache_path, index_path, args):
+    from viaf_extractor import use_viaf_index
+
+    use_viaf_index(index_path)
+    try:
+        return build_cache(paths, cache_path, args, new=True)
+    finally:
+        use_viaf_index(None)
+
+
+def run_scenario(scenario, args):
+    """
+    Runs a single scenario in this process (called by run_child) and prints the results as JSON
+    """
+    paths = cmdi_paths(os.path.join(args.corpus, "cmdis"))
+    cache_path = os.path.join(args.workdir, "cache.csv")
+    index_path = os.path.join(args.workdir, "viaf_index.sqlite")
+    if scenario == "cold":
+        function = lambda: build_cache(paths, cache_path, args, new=True)
+    elif scenario == "warm":
+        function = lambda: build_cache(paths, cache_path, args, new=False)
+    elif scenario == "import":
+        function = lambda: import_dump(args.corpus, index_path)
+    elif scenario == "offline":
+        function = lambda: build_cache_offline(paths, os.path.join(args.workdir, "offline.csv"), index_path, args)
+    elif scenario == "update":
+        output_dir = os.path.join(args.workdir, "updated_cmdis")
+        os.makedirs(output_dir, exist_ok=True)
+        function = lambda: update_cmdis(paths, cache_path, output_dir, args)
+    else:
+        function = lambda: post_cmdis(paths, cache_path, args)
+    items = len(paths) * args.webapp_rounds if scenario == "webapp" else len(paths)
+    # the time needed to import the scripts is measured by startup_benchmark.py, not here
+    with contextlib.redirect_stdout(io.StringIO()):
+        import pandas, cmdi_extractor, update_cmdi, viaf_dump, webapp
+    print(json.dumps(measure(scenario, function, items, trace=args.trace)))
+
+
+def run_child(scenario, workdir, args, trace=False):
+    """
+    Runs a scenario in a fresh python process, so that its memory is not shared with other scenarios
+    :return: the results of the scenario (a dict, see measure)
+    """
+    command = [sys.executable, os.path.abspath(__file__), args.corpus, "--run_scenario", scenario,
+               "--workdir", workdir, "--specification", args.specification,
+               "--namespace_tag_list", args.namespace_tag_list, "--authoritative_tag", args.authoritative_tag,
+               "--webapp_rounds", str(args.webapp_rounds)]
+    if trace:
+        command.append("--trace")
+    env = dict(os.environ)
+    # the webapp would load the cache of the repository when it is imported, the scenarios use their own cache
+    env.pop("BIODATANER_PRELOAD_CACHE", None)
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(args):
+    paths = cmdi_paths(os.path.join(args.corpus, "cmdis"))
+    if not paths:
+        raise ValueError("no CMDI files found in %s, run generate_corpus.py first" % args.corpus)
+
+    server = None
+    if args.viaf_url is None:
+        server = StubVIAFServer(("127.0.0.1", 0), os.path.join(args.corpus, "responses"),
+                                latency=args.latency, jitter=args.jitter).start()
+        args.viaf_url = server.url
+    # viaf_extractor reads the server address when it is imported (by the processes running the scenarios)
+    os.environ["BIODATANER_VIAF_URL"] = args.viaf_url
+
+    workdir = tempfile.mkdtemp(prefix="biodataner_bench_")
+    results = []
+    try:
+        for scenario in args.scenarios:
+            # the other scenarios need a cache or an index, create them without measuring
+            if scenario in ["warm", "update", "webapp"] and not os.path.exists(os.path.join(workdir, "cache.csv")):
+                run_child("cold", workdir, args)
+            if scenario == "offline" and not os.path.exists(os.path.join(workdir, "viaf_index.sqlite")):
+                run_child("import", workdir, args)
+            if server is not None:
+                server.reset_stats()
+            result = run_child(scenario, workdir, args)
+            if server is not None:
+                result["viaf_requests"] = dict(server.stats)
+            result["peak_traced_mb"] = run_child(scenario, workdir, args, trace=True)["peak_traced_mb"]
+            print(json.dumps(result))
+            results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    corpus_info = os.path.join(args.corpus, "corpus.json")
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "viaf_url": args.viaf_url,
+              "latency": args.latency,
+              "corpus": json.load(open(corpus_info, encoding="utf-8")) if os.path.exists(corpus_info) else None,
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as out_f:
+        json.dump(report, out_f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", type=str, help="the directory written by generate_corpus.py")
+    parser.add_argument("--output", type=str, default="bench_results.json",
+                        help="the JSON file the results are written to")
+    parser.add_argument("--scenarios", type=str, nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--specification", type=str, default=os.path.join(REPOSITORY_DIR, "entity_spec.json"))
+    parser.add_argument("--namespace_tag_list", type=str,
+                        default=os.path.join(REPOSITORY_DIR, "namespaces_tags.csv"))
+    parser.add_argument("--authoritative_tag", type=str, default="AuthoritativeID")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds the stub VIAF server delays every request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="random extra delay of up to this many seconds per request")
+    parser.add_argument("--viaf_url", type=str, default=None,
+                        help="use an already running (stub) VIAF server instead of starting one")
+    parser.add_argument("--webapp_rounds", type=int, default=1, help="how often every CMDI is posted to the webapp")
+    # used by run_child to run a single scenario in a new process
+    parser.add_argument("--run_scenario", type=str, choices=SCENARIOS, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario is not None:
+        run_scenario(args.run_scenario, args)
+    else:
+        report = run(args)
+        print("results stored to %s" % args.output)
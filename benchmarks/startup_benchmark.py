@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Measures how long importing the entry points (the scripts in python_scripts and the webapp) takes and checks the
+times against the budget in startup_budget.json. Every import runs in a fresh interpreter; the median of several
+runs is compared to the budget. The budget also lists modules (e.g. pandas, requests) that must not be imported at
+start up, because they are only needed once a cache is loaded or VIAF is queried. An entry of the budget can import
+another module than its name ("module") and set environment variables ("env"), e.g. to preload the cache of the
+webapp.
+
+The script exits with status 1 if a budget is exceeded, so it can be used as a check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# run in a fresh interpreter: import the module and report the time and the heavy modules that were loaded
+MEASURE = """
+import json, sys, time
+sys.path.insert(0, %r)
+start = time.perf_counter()
+import %s
+milliseconds = (time.perf_counter() - start) * 1000
+print(json.dumps({"ms": milliseconds, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure_import(module, forbidden, runs, variables=None):
+    """
+    Imports a module 'runs' times, each time in a new python process
+    :param module: the name of the module in python_scripts, e.g. cmdi_extractor
+    :param forbidden: the modules that should not be loaded by the import
+    :param runs: the number of runs
+    :param variables: environment variables set for the import (e.g. BIODATANER_PRELOAD_CACHE)
+    :return: a dict with the median time and the forbidden modules that were loaded
+    """
+    times = []
+    loaded = set()
+    code = MEASURE % (os.path.join(REPOSITORY_DIR, "python_scripts"), module, list(forbidden))
+    env = dict(os.environ)
+    # the webapp loads the cache at import time if this is set, only the entries of the budget that ask for it do
+    env.pop("BIODATANER_PRELOAD_CACHE", None)
+    env.update(variables or {})
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=REPOSITORY_DIR, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["ms"])
+        loaded.update(result["loaded"])
+    return {"median_ms": round(statistics.median(times), 1), "max_ms": round(max(times), 1),
+            "forbidden_loaded": sorted(loaded)}
+
+
+def check(budget_path, output_path=None):
+    """
+    Measures all modules listed in the budget file
+    :return: a tuple (bool: all budgets met, dict: the report)
+    """
+    with open(budget_path, encoding="utf-8") as in_f:
+        budget = json.load(in_f)
+    report = {"python": sys.version.split()[0], "results": {}}
+    ok = True
+    for name, limits in budget["modules"].items():
+        result = measure_import(limits.get("module", name), limits.get("forbidden", []), budget.get("runs", 5),
+                                limits.get("env"))
+        result["budget_ms"] = limits["budget_ms"]
+        result["ok"] = result["median_ms"] <= limits["budget_ms"] and not result["forbidden_loaded"]
+        ok = ok and result["ok"]
+        report["results"][name] = result
+        print("%-18s %8.1f ms (budget %d ms)%s%s" % (name, result["median_ms"], limits["budget_ms"],
+                                                      "  loads " + ", ".join(result["forbidden_loaded"])
+                                                      if result["forbidden_loaded"] else "",
+                                                      "" if result["ok"] else "  FAILED"))
+    report["ok"] = ok
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as out_f:
+            json.dump(report, out_f, indent=2)
+    return ok, report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=str, default=os.path.join(BENCHMARK_DIR, "startup_budget.json"),
+                        help="the JSON file with the import time budget of every module")
+    parser.add_argument("--output", type=str, default=None, help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    ok, report = check(args.budget, args.output)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for the VIAF web service. It replays recorded responses for the three endpoints used by
+viaf_extractor.py (SRU search, AutoSuggest and /viaf/{id}/viaf.xml) from a directory, with an injectable latency
+per request, so that benchmarks are reproducible and do not depend on the network.
+
+Layout of the responses directory (keys are produced by response_key):
+
+    search/<key>.xml       SRU answer to 'local.mainHeadingEl all "<name>"'
+    names/<key>.xml        SRU answer to 'local.names all "<name>"'
+    autosuggest/<key>.json AutoSuggest answer for <name>
+    cluster/<viaf_id>.xml  the viaf.xml of a cluster
+
+Names without a recording get an empty answer. With --record_from the stub forwards misses to the given upstream
+server and stores the answer, which is how real VIAF responses can be recorded once and replayed afterwards.
+"""
+import argparse
+import collections
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMPTY_SRU = '<?xml version="1.0" encoding="UTF-8"?>' \
+            '<searchRetrieveResponse xmlns="http://www.loc.gov/zing/srw/"><version>1.1</version>' \
+            '<numberOfRecords>0</numberOfRecords><records/></searchRetrieveResponse>'
+EMPTY_AUTOSUGGEST = '{"query": "", "result": null}'
+
+# the SRU queries send the name in double quotes, e.g. local.names all "Erhard Hinrichs"
+quoted_name = re.compile(r'"([^"]*)"?')
+
+
+def response_key(name):
+    """
+    Turns a name into the file name under which its recorded responses are stored
+    :param name: [String] the name of the entity as it is sent to VIAF, e.g. Erhard Hinrichs
+    :return: the key (a String that is safe to use as a file name)
+    """
+    return urllib.parse.quote(name, safe="")
+
+
+class StubVIAFServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, responses, latency=0.0, jitter=0.0, record_from=None, seed=0):
+        """
+        :param address: a tuple (host, port) to listen on, port 0 picks a free port
+        :param responses: the directory with the recorded responses
+        :param latency: the number of seconds every request is delayed
+        :param jitter: a random extra delay of up to this number of seconds
+        :param record_from: an upstream URL (e.g. https://viaf.org) to forward unknown requests to; the answers
+        are stored in the responses directory
+        :param seed: the seed for the jitter
+        """
+        super().__init__(address, StubVIAFHandler)
+        self.responses = responses
+        self.latency = latency
+        self.jitter = jitter
+        self.record_from = record_from
+        self.stats = collections.Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def delay(self):
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def count(self, endpoint):
+        with self._lock:
+            self.stats[endpoint] += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    def start(self):
+        """
+        Serves requests in a background thread and returns the server
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+class StubVIAFHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        query = params.get("query", [""])[0]
+
+        if url.path == "/viaf/search":
+            name = quoted_name.search(query)
+            name = name.group(1) if name else query
+            folder = "names" if query.startswith("local.names") else "search"
+            self._reply(folder, os.path.join(folder, response_key(name) + ".xml"), EMPTY_SRU, "text/xml")
+        elif url.path == "/viaf/AutoSuggest":
+            self._reply("autosuggest", os.path.join("autosuggest", response_key(query) + ".json"),
+                        EMPTY_AUTOSUGGEST, "application/json")
+        elif url.path.startswith("/viaf/") and url.path.endswith("/viaf.xml"):
+            viaf_id = url.path.split("/")[2]
+            self._reply("cluster", os.path.join("cluster", response_key(viaf_id) + ".xml"), None, "text/xml")
+        else:
+            self.server.count("unknown")
+            self.send_error(404)
+
+    def _reply(self, endpoint, relative_path, default, content_type):
+        self.server.count(endpoint)
+        self.server.delay()
+        path = os.path.join(self.server.responses, relative_path)
+        if os.path.exists(path):
+            with open(path, "rb") as in_f:
+                body = in_f.read()
+        elif self.server.record_from:
+            body = self._record(path)
+        elif default is not None:
+            body = default.encode("utf-8")
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _record(self, path):
+        with urllib.request.urlopen(self.server.record_from.rstrip("/") + self.path) as upstream:
+            body = upstream.read()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as out_f:
+            out_f.write(body)
+        return body
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("responses", type=str,
+                        help="the directory with the recorded responses (e.g. the one written by generate_corpus.py)")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every request is delayed")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra delay of up to this many seconds")
+    parser.add_argument("--record_from", type=str, default=None,
+                        help="forward unknown requests to this server (e.g. https://viaf.org) and record them")
+    args = parser.parse_args()
+
+    server = StubVIAFServer((args.host, args.port), args.responses, latency=args.latency, jitter=args.jitter,
+                            record_from=args.record_from)
+    print("serving %s on %s" % (args.responses, server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
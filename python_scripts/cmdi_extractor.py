@@ -1,11 +1,15 @@
 #import xml.etree.ElementTree as ET
 from lxml import etree as ET
 from entity_cache import EntityCache
-from viaf_extractor import extract_viaf_id
+from entity_extractors import get_extractor, number
+from viaf_extractor import extract_viaf_id, use_viaf_index
 import re
 import argparse
 import os
 
+# the parsed namespaces_tags.csv files, path -> (modification time, configuration), see tag_configuration
+_tag_configurations = {}
+
 
 def get_name(node):
     """
@@ -31,6 +35,8 @@ def get_name(node):
 def get_names_with_ids(cmdi, namespace, tag, authoritytag):
     """
     This method takes a cmdi element tree as input. For a given entity type it returns all corresponding names.
+    cmdi_to_cache uses the extractors of entity_extractors.py instead, which give the same result for the 'generic'
+    extractor.
     If authority IDs available (XML tag defined by 'authoritytag'), the map returned will contain a name with the
     corresponding VIAF ID found in the xml
     :param cmdi: the CMDI file as element tree
@@ -45,8 +51,6 @@ def get_names_with_ids(cmdi, namespace, tag, authoritytag):
     names = set()
     # this will store a name with a corresponding VIAF ID
     name2viaf = {}
-    # this pattern matches any (longer) number, e.g. '234'
-    number = re.compile("\d+")
     # this query extracts all entities from the CMDI, e.g. if the XML element you are interested in is 'Person' this
     # query will extract all 'Persons' form the CMDI
     query = './/{%s}%s' % (namespace, tag)
@@ -121,18 +125,42 @@ def create_cache(save_path, delimiter, specification, new):
     return cache
 
 
+def tag_configuration(filepath="namespaces_tags.csv"):
+    """
+    This method reads a CSV file containing namespace prefixes, their corresponding tags, the entity types and the
+    (optional) kinds of extractors (see entity_extractors.py) that find the names of the entities. The file is only
+    parsed again if it has been modified.
+    :param filepath: The filepath of the CSV. Standard should be "namespaces_tags.csv"
+    :return: a tuple of tuples (prefix, tag, entity_type, kind of extractor), the kind is 'generic' if none is given
+    """
+    modified = os.path.getmtime(filepath)
+    if _tag_configurations.get(filepath, (None,))[0] != modified:
+        r = []
+        with open(filepath, encoding="utf-8") as in_f:
+            for line in in_f:
+                columns = line.strip().split()
+                r.append((columns[0], columns[1], columns[2], columns[3] if len(columns) > 3 else "generic"))
+        _tag_configurations[filepath] = (modified, tuple(r))
+    return _tag_configurations[filepath][1]
+
+
 def tag_list(filepath="namespaces_tags.csv"):
     """
     This method reads a CSV file containing namespace prefixes and their corresponding tags
     :param filepath: The filepath of the CSV. Standard should be "namespaces_tags.csv"
     :return: a list object containing tuples with prefix, their tag and entity_tag
     """
-    r = []  # form [(prefix, tag, entity_tag), ...]
-    with open(filepath, encoding="utf-8") as in_f:
-        for line in in_f:
-            prefix, tag, entity_type = line.strip().split()
-            r.append((prefix, tag, entity_type))
-    return r
+    return [(prefix, tag, entity_type) for prefix, tag, entity_type, _ in tag_configuration(filepath)]
+
+
+def tag_extractors(filepath="namespaces_tags.csv"):
+    """
+    This method reads the (optional) fourth column of the CSV with namespace prefixes and tags, the kind of extractor
+    (see entity_extractors.py) that finds the names of the entities
+    :param filepath: The filepath of the CSV. Standard should be "namespaces_tags.csv"
+    :return: a dict (prefix, tag) -> kind of extractor, 'generic' if no extractor is given
+    """
+    return {(prefix, tag): kind for prefix, tag, _, kind in tag_configuration(filepath)}
 
 
 def get_namespace(cmdi, prefix):
@@ -150,16 +178,22 @@ def get_namespace(cmdi, prefix):
 
 def cmdi_to_cache(cmdi, cache, args):
     # when a namespace_tag list is passed down as an argument used it to update/create the cache
-    tag_l = tag_list(args.namespace_tag_list)
-
-    for prefix, tag, entity_type in tag_l:
+    for prefix, tag, entity_type, kind in tag_configuration(args.namespace_tag_list):
         print("prefix, tag, entity_type =", prefix, tag, entity_type)
         namespace = get_namespace(cmdi, prefix)
-        entities, entity2viaf = get_names_with_ids(cmdi, namespace, tag, args.authoritative_tag)
+        if namespace is None:
+            continue
+        extractor = get_extractor(kind, namespace, tag, args.authoritative_tag)
+        entities, entity2viaf = extractor.extract(cmdi)
         print("entities, entity2viaf =", entities, entity2viaf)
 
         # update the cache
         for e in entities:
+            # a variant spelling of a name that is already in the cache (e.g. 'Hinrichs, Erhard' for 'Erhard Hinrichs')
+            # is stored as its alias, afterwards it is found like the name itself
+            name = cache.resolve_name(e, entity_type)
+            if cache.has_entry(name):
+                cache.enter_alias(e, name)
             if e in entity2viaf and not cache.has_verified_viaf(e):
                 cache.enter_entity(e)
                 verified_viaf = entity2viaf[e]
@@ -191,8 +225,13 @@ if __name__ == '__main__':
     parser.add_argument("--delimiter", help="the delimiter to save the cache with", type=str, default="\t")
     parser.add_argument("--new_cache", help="set this flag if you want to create a new cache",
                         action="store_true")
+    parser.add_argument("--viaf_index", help="resolve names offline with an index of the VIAF dump (created with "
+                                             "viaf_dump.py) instead of querying VIAF", type=str, default=None)
     args = parser.parse_args()
 
+    if args.viaf_index:
+        use_viaf_index(args.viaf_index)
+
     cache = create_cache(save_path=args.path_to_cache, new=args.new_cache, delimiter=args.delimiter,
                          specification=args.specification)
     for subdir, dirs, files in os.walk(args.cmdi_files):
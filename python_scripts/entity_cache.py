@@ -1,5 +1,23 @@
-import pandas as pd
 import json
+from name_normalizer import normalize_name
+
+# separates several aliases of an entity in the alias column
+ALIAS_SEPARATOR = "|"
+
+# pandas is imported when the first cache is created and not at the top, so that importing this module (e.g. by
+# cmdi_extractor.py) stays fast
+pd = None
+
+
+def _pandas():
+    """
+    Imports pandas (only once) and returns the module
+    """
+    global pd
+    if pd is None:
+        import pandas
+        pd = pandas
+    return pd
 
 
 class EntityCache:
@@ -12,6 +30,8 @@ class EntityCache:
         :param specification:
         :param create_new:
         """
+        _pandas()
+
         # read the specification (you can specify the names of your columns in the json file)
         try:
             print("JSON File:", specification)
@@ -33,6 +53,57 @@ class EntityCache:
                 self._cache = pd.read_csv(filepath, delimiter=delimiter, index_col=0, dtype=str)
             except IOError:
                 print("csv file could not be read, please check your database")
+        # maps the normalized form of every name and alias to the index of its entry, so that variant spellings of a
+        # name are found without scanning the cache
+        self._index = {}
+        self._build_index()
+
+    def _build_index(self):
+        """
+        This method (re)builds the lookup index from the name and alias columns of the cache
+        """
+        self._index = {}
+        for index, name in self._cache[self.name].items():
+            self._index_name(name, index)
+        if self.alias in self._cache.columns:
+            for index, aliases in self._cache[self.alias].dropna().items():
+                for alias in aliases.split(ALIAS_SEPARATOR):
+                    self._index_name(alias, index)
+
+    def _index_name(self, name, index):
+        """
+        Adds a name to the lookup index, if its normalized form is not already taken by another entry
+        :return: True if the name now points to the entry with the given index
+        """
+        if not isinstance(name, str) or not name.strip():
+            return False
+        return self._index.setdefault(normalize_name(name), index) == index
+
+    def _lookup(self, name, name_type=None):
+        """
+        :param name_type: the type of the entity (e.g. Personal), if it is given, the variant spellings of this type
+        match as well (e.g. 'last name, first name')
+        :return: the index of the entry of a name (or one of its variant spellings / aliases), None if there is none
+        """
+        if not isinstance(name, str):
+            return None
+        index = self._index.get(normalize_name(name))
+        if index is None and name_type is not None:
+            index = self._index.get(normalize_name(name, name_type))
+        return index
+
+    def resolve_name(self, name, name_type=None):
+        """
+        This method returns the name under which an entity is stored in the cache
+        :param name: [String] the name of the entity or a variant spelling of it, e.g. Hinrichs, Erhard
+        :param name_type: [String] the type of the entity, e.g. Personal. Names of persons are also found in the order
+        'last name, first name'
+        :return: the stored name, e.g. Erhard Hinrichs, or the given name if the entity has no entry in the cache
+        """
+        index = self._lookup(name, name_type)
+        if index is None:
+            return name
+        return self._cache.at[index, self.name]
 
     def get_entity_candidate_viafs(self, name):
         """
@@ -69,17 +140,55 @@ class EntityCache:
             print("the entity %s already has an entry in the dataframe" % name)
         else:
             current_index = self.size
+            while current_index in self._cache.index:
+                current_index += 1
             self._cache.at[current_index, self.name] = name
+            self._index_name(name, current_index)
+
+    def enter_alias(self, alias, name=None):
+        """
+        This method stores a variant spelling of an entity in the alias column, if it differs from the name and the
+        aliases that are already stored. Afterwards the alias can be used like the name.
+        :param alias: [String] the variant spelling, e.g. Hinrichs, Erhard
+        :param name: [String] the name of the entity the alias belongs to, e.g. Erhard Hinrichs. If it is not given,
+        the entity is the one the alias already resolves to (e.g. because it only differs in whitespace or accents)
+        """
+        index = self._lookup(alias if name is None else name)
+        if index is None:
+            print("the entity %s has no entry in the cache" % (alias if name is None else name))
+            return
+        if not self._index_name(alias, index):
+            print("the alias %s already belongs to another entity in the cache" % alias)
+            return
+        aliases = self.get_aliases(alias)
+        if alias == self._cache.at[index, self.name] or alias in aliases:
+            return
+        self._cache.at[index, self.alias] = ALIAS_SEPARATOR.join(aliases + [alias])
+
+    def get_aliases(self, name):
+        """
+        This method returns the variant spellings that are stored for an entity
+        :param name: [String] the name of the entity (or one of its aliases), e.g. Thorsten Trippel
+        :return: a list of Strings (empty if there are no aliases or no entry)
+        """
+        index = self._lookup(name)
+        if index is None or self.alias not in self._cache.columns:
+            return []
+        aliases = self._cache.at[index, self.alias]
+        if not isinstance(aliases, str) or not aliases:
+            return []
+        return aliases.split(ALIAS_SEPARATOR)
 
     def get_entry(self, name):
         """
-        This method will return the entry of a entity, based on the first and last name
+        This method will return the entry of a entity, based on the first and last name. Variant spellings of the name
+        (whitespace, Unicode normalization, accents) and stored aliases match as well.
         :param name: [String] the name of the entity, e.g. Thorsten Trippel
         :return: a DataFrame object, containing the entry matching the entity or None if there is no entry in the cache
         """
-        if self.has_entry(name):
-            return self._cache.loc[
-                (self._cache[self.name] == name)]
+        index = self._lookup(name)
+        if index is not None:
+            return self._cache.loc[[index]]
         else:
             print("the entity %s has no entry in the cache" % name)
 
@@ -89,11 +198,7 @@ class EntityCache:
         :param name: [String] the name of the entity, e.g. Thorsten Trippel
         :return: a boolean, true if the entity has an entry and false if not
         """
-        existing_entry = self._cache.loc[
-            (self._cache[self.name] == name)]
-        if existing_entry.empty:
-            return False
-        return True
+        return self._lookup(name) is not None
 
     def has_verified_viaf(self, name):
         """
@@ -130,11 +235,10 @@ class EntityCache:
         :param name: [String] the name of the entity, e.g. Thorsten Trippel
         :return: None (with warning) if the entity is not in the index, else the index [int]
         """
-        if self.has_entry(name):
-            return self.get_entry(name).index.values[0]
-        else:
+        index = self._lookup(name)
+        if index is None:
             print("the entity %s has no entry in the cache" % name)
-            return None
+        return index
 
     def enter_candidate_viafs(self, name, candidate_ids):
         """
@@ -0,0 +1,183 @@
+import re
+from operator import itemgetter
+
+from lxml import etree as ET
+
+# this pattern matches any (longer) number, e.g. '234'
+number = re.compile(r"\d+")
+
+UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LOWER = "abcdefghijklmnopqrstuvwxyz"
+
+# the kinds of extractors, a kind is a list of alternatives: the first alternative that finds a name for an entity
+# is used. an alternative is a list of parts (XPath predicates on the children of the entity), the texts of the
+# matching children are joined in the order of the parts, e.g. first the given names, then the family names
+EXTRACTOR_KINDS = {}
+# the compiled extractors, (kind, namespace, tag, authoritytag) -> EntityExtractor
+_extractors = {}
+
+
+def local_names(*names):
+    """
+    Returns an XPath predicate matching elements with one of the given local names (namespaces are ignored)
+    :param names: the local names, e.g. 'firstName', 'givenName'
+    """
+    return " or ".join("local-name()='%s'" % name for name in names)
+
+
+def local_name_contains(*parts):
+    """
+    Returns an XPath predicate matching elements whose local name contains one of the given Strings (ignoring case)
+    :param parts: the Strings in lower case, e.g. 'name', 'agency'
+    """
+    return " or ".join("contains(translate(local-name(), '%s', '%s'), '%s')" % (UPPER, LOWER, part)
+                       for part in parts)
+
+
+def register_extractor(kind, alternatives):
+    """
+    Registers a new kind of extractor, it can then be used in the namespaces_tags.csv (fourth column)
+    :param kind: the name of the kind, e.g. 'person'
+    :param alternatives: a list of alternatives, each a list of XPath predicates on the children of an entity (see
+    EXTRACTOR_KINDS)
+    """
+    EXTRACTOR_KINDS[kind] = [list(parts) for parts in alternatives]
+    for key in [key for key in _extractors if key[0] == kind]:
+        del _extractors[key]
+
+
+# the heuristic of cmdi_extractor.get_name: all children whose tag contains 'name' or 'agency'. it is the default,
+# the other kinds have to be chosen in the namespaces_tags.csv: they find different names than 'generic' (and so
+# other cache entries), e.g. 'person' puts the given names first whatever their order in the CMDI, 'organisation'
+# ignores a <departmentName>
+register_extractor("generic", [[local_name_contains("name", "agency")]])
+register_extractor("person", [
+    [local_names("firstName", "givenName", "givenNames", "forename", "forenames"),
+     local_names("middleName", "middleNames"),
+     local_names("lastName", "familyName", "surname")],
+    [local_names("name", "fullName", "displayName", "personName")]])
+register_extractor("organisation", [
+    [local_names("name", "organisationName", "organizationName", "OrganisationName", "OrganizationName",
+                 "fundingAgency", "agency")],
+    [local_names("OrganisationShortName", "OrganizationShortName", "shortName")]])
+
+
+class EntityExtractor:
+
+    def __init__(self, kind, namespace, tag, authoritytag):
+        """
+        This class extracts the names (and VIAF IDs) of all entities of one (namespace, tag) from a CMDI. The XPath
+        predicates of the kind are compiled once; they are evaluated only once for every distinct tag of a child,
+        afterwards a child is classified with a dictionary lookup of its tag.
+        :param kind: the kind of extractor (a key of EXTRACTOR_KINDS)
+        :param namespace: the namespace URI of the tag
+        :param tag: the tag of the entities, e.g. 'Person'
+        :param authoritytag: the tag for authority files (e.g. 'AuthoritativeID')
+        """
+        if kind not in EXTRACTOR_KINDS:
+            raise KeyError("unknown extractor %s, known extractors: %s" % (kind, ", ".join(sorted(EXTRACTOR_KINDS))))
+        self._kind = kind
+        self._namespace = namespace
+        self._tag = tag
+        self._entity_tag = "{%s}%s" % (namespace, tag)
+        self._authority_tag = "{%s}%s" % (namespace, authoritytag)
+        self._id_tag = "{%s}id" % namespace
+        self._issuer_tag = "{%s}issuingAuthority" % namespace
+        alternatives = EXTRACTOR_KINDS[kind]
+        # (alternative, part) for every part, in the order in which the texts are joined
+        self._slots = [(a, p) for a, parts in enumerate(alternatives) for p in range(len(parts))]
+        self._parts = [ET.XPath("self::*[%s]" % alternatives[a][p]) for a, p in self._slots]
+        # tag of a child -> the index of the first matching part (in self._slots) or None
+        self._tag2slot = {}
+
+    def _slot(self, child):
+        """
+        Returns the index of the part (in self._slots) a child of an entity belongs to, None if it is not part of
+        the name
+        """
+        tag = child.tag
+        if tag not in self._tag2slot:
+            slot = None
+            # comments and processing instructions have no name
+            if isinstance(tag, str):
+                for i, xpath in enumerate(self._parts):
+                    if xpath(child):
+                        slot = i
+                        break
+            self._tag2slot[tag] = slot
+        return self._tag2slot[tag]
+
+    def name(self, entity, text=True):
+        """
+        Returns the name of a single entity (e.g. a 'Person' element)
+        :param entity: the element of the entity
+        :param text: if False, only the children of the entity are used and not its own content
+        :return: None, if no name can be found, or the name (String)
+        """
+        found = []
+        tag2slot = self._tag2slot
+        for child in entity:
+            slot = tag2slot[child.tag] if child.tag in tag2slot else self._slot(child)
+            if slot is not None and child.text:
+                found.append((slot, child.text))
+        if found:
+            # the slots are ordered by alternative and part, the first alternative that was found is used
+            found.sort(key=itemgetter(0))
+            alternative = self._slots[found[0][0]][0]
+            return " ".join(text for slot, text in found if self._slots[slot][0] == alternative)
+        # the name might be specified in the entity element itself, e.g. <LegalOwner>Thorsten Trippel</LegalOwner>
+        if text and entity.text and entity.text.strip():
+            return entity.text.strip()
+        return None
+
+    def extract(self, cmdi):
+        """
+        Returns all names of the entities in a CMDI, and the VIAF IDs for the names if they are in the CMDI
+        :param cmdi: the CMDI file as element tree
+        :return: a tuple of (set: names, dict: name2viaf), as cmdi_extractor.get_names_with_ids
+        """
+        names = set()
+        name2viaf = {}
+        for entity in cmdi.iter(self._entity_tag):
+            name = self.name(entity)
+            if not name:
+                continue
+            names.add(name)
+            if name in name2viaf:
+                continue
+            for authority in entity.iter(self._authority_tag):
+                viaf_id = authority.findtext(self._id_tag)
+                issuer = authority.findtext(self._issuer_tag)
+                if viaf_id and issuer and "VIAF" in issuer:
+                    id_number = number.search(viaf_id)
+                    if id_number:
+                        name2viaf[name] = str(int(id_number.group(0)))
+                        break
+        return names, name2viaf
+
+    @property
+    def kind(self):
+        return self._kind
+
+    @property
+    def namespace(self):
+        return self._namespace
+
+    @property
+    def tag(self):
+        return self._tag
+
+
+def get_extractor(kind, namespace, tag, authoritytag):
+    """
+    Returns the (compiled) extractor for entities of one (namespace, tag)
+    :param kind: the kind of extractor (a key of EXTRACTOR_KINDS), e.g. 'generic'
+    :param namespace: the namespace URI of the tag
+    :param tag: the tag of the entities, e.g. 'Person'
+    :param authoritytag: the tag for authority files (e.g. 'AuthoritativeID')
+    :return: an EntityExtractor
+    """
+    key = (kind, namespace, tag, authoritytag)
+    if key not in _extractors:
+        _extractors[key] = EntityExtractor(kind, namespace, tag, authoritytag)
+    return _extractors[key]
@@ -0,0 +1,68 @@
+import re
+import string
+import unicodedata as unicode
+
+# the name type (as in the namespaces_tags.csv and VIAF) of names that can be given as 'last name, first name'
+PERSONAL = "Personal"
+# the punctuation that MARC headings (and so VIAF) put at the end of a name, e.g. 'Hinrichs, Erhard,'
+TRAILING_PUNCTUATION = string.whitespace + ",."
+
+# a name that ends with an initial, e.g. 'Hinrichs, E'
+initial = re.compile(r"(^|\W)\w$")
+
+
+def strip_punctuation(name):
+    """
+    Removes the punctuation at the end of a name
+    :param name: [String] the name, e.g. Hinrichs, Erhard,
+    :return: the name without trailing commas, periods and whitespace, e.g. Hinrichs, Erhard. The period after an
+    initial is kept, e.g. Hinrichs, E.
+    """
+    stripped = name.rstrip(TRAILING_PUNCTUATION)
+    if "." in name[len(stripped):] and initial.search(stripped):
+        stripped += "."
+    return stripped
+
+
+def name_parts(name):
+    """
+    :param name: [String] the name, e.g. Hinrichs, Erhard,
+    :return: the non-empty, comma separated parts of a name without its trailing punctuation, e.g. ['Hinrichs',
+    'Erhard']
+    """
+    return [part.strip() for part in strip_punctuation(name).split(',') if part.strip()]
+
+
+def reorder_name(name):
+    """
+    Puts a name given as 'last name, first name' (as in VIAF headings) into the order 'first name last name'. As VIAF
+    headings carry further parts (e.g. 'Smith, John, Jr.'), only the first two parts are used.
+    :param name: [String] the name, e.g. Hinrichs, Erhard,
+    :return: the reordered name, e.g. Erhard Hinrichs (names without a comma are returned unchanged)
+    """
+    if ',' in name:
+        parts = name_parts(name)
+        if len(parts) < 2:
+            return " ".join(parts)
+        name = parts[1] + " " + parts[0]
+    return name
+
+
+def normalize_name(name, name_type=None):
+    """
+    Returns the key under which a name is looked up in the cache. Variant spellings of the same name get the same key:
+    the Unicode form (NFC/NFD), diacritics, case and whitespace are folded, e.g. 'Erhard  Hinrichs' and
+    'erhard hinrichs' both become 'erhard hinrichs'. For personal names the trailing punctuation and the order
+    'last name, first name' are folded as well ('Hinrichs, Erhard,'); names with several commas ('Müller, Hans, Jr.')
+    and the names of organisations ('ACME, Inc.') keep their commas, so that no part of a name is lost.
+    :param name: [String] the name of the entity, e.g. Erhard Hinrichs
+    :param name_type: [String] the type of the entity, e.g. Personal or Corporate (None if it is unknown)
+    :return: the normalized key (a String)
+    """
+    # decompose characters so that diacritics become separate (combining) characters and can be dropped
+    name = unicode.normalize('NFKD', name)
+    name = "".join(char for char in name if not unicode.combining(char))
+    if name_type == PERSONAL:
+        parts = name_parts(name)
+        name = parts[1] + " " + parts[0] if len(parts) == 2 else ", ".join(parts)
+    return " ".join(name.split()).casefold()
@@ -2,7 +2,8 @@ from unicodedata import name
 from lxml import etree as ET
 from entity_cache import EntityCache
 from viaf_extractor import extract_viaf_id
-from cmdi_extractor import read_cmdi, get_name, tag_list, get_namespace
+from cmdi_extractor import read_cmdi, get_name, tag_configuration, get_namespace
+from entity_extractors import get_extractor
 import re
 import argparse
 import os
@@ -24,7 +25,7 @@ def load_cache(save_path, delimiter, specification):
     return cache
 
 
-def add_auth_ids(cmdi, namespace, tag, authoritytag, cache):
+def add_auth_ids(cmdi, namespace, tag, authoritytag, cache, extractor=None, entity_type=None):
     """
     This method adds all authoritative IDs to a specified CMDI
     :param cmdi: The CMDI file as XML element tree
@@ -32,6 +33,8 @@ def add_auth_ids(cmdi, namespace, tag, authoritytag, cache):
     :param tag: The parent tag where the authoritytag should be located
     :param authoritytag: The Name of the authority tag
     :param cache: The cache object
+    :param extractor: The EntityExtractor that finds the name of an entity (get_name is used if None)
+    :param entity_type: The type of the entities (e.g. Personal), used to find variant spellings of their names
     :return: The modified CMDI file
     """
     parent_auth_tag = authoritytag + "s"
@@ -41,7 +44,10 @@ def add_auth_ids(cmdi, namespace, tag, authoritytag, cache):
 
     # iterate through all entities and add ids
     for entity in entities:
-        cmdi, contains_ver_id = _add_ver_id(cmdi, namespace, tag, authoritytag, cache, entity)
+        # as get_name, only the children of the entity are used: IDs are not added to entities that only have text
+        name = extractor.name(entity, text=False) if extractor is not None else get_name(entity)
+        name = cache.resolve_name(name, entity_type)
+        cmdi, contains_ver_id = _add_ver_id(cmdi, namespace, tag, authoritytag, cache, entity, name)
 
         # if a verified id is already in the CMDI, delete all (possibly) remaining candidate IDs
         if contains_ver_id:
@@ -51,14 +57,13 @@ def add_auth_ids(cmdi, namespace, tag, authoritytag, cache):
                 pass
         # if no verified id is found, add candidate ids from the cache
         else:
-            cmdi = _add_cand_id(cmdi, namespace, tag, ("candidate"+authoritytag), cache, entity)
+            cmdi = _add_cand_id(cmdi, namespace, tag, ("candidate"+authoritytag), cache, entity, name)
 
     return cmdi
 
 
-def _add_ver_id(cmdi, namespace, tag, authoritytag, cache, entity):
+def _add_ver_id(cmdi, namespace, tag, authoritytag, cache, entity, name):
     parent_auth_tag = authoritytag + "s"
-    name = get_name(entity)
     authority_ids = cache.get_entity_verified_viaf(name)
 
     # return unmodified cmdi if no id in cache
@@ -84,9 +89,8 @@ def _add_ver_id(cmdi, namespace, tag, authoritytag, cache, entity):
 
 
 
-def _add_cand_id(cmdi, namespace, tag, authoritytag, cache, entity):
+def _add_cand_id(cmdi, namespace, tag, authoritytag, cache, entity, name):
     parent_auth_tag = authoritytag + "s"
-    name = get_name(entity)
     authority_ids = cache.get_entity_candidate_viafs(name)
 
     # return unmodified cmdi if no id in cache
@@ -115,10 +119,12 @@ def _add_cand_id(cmdi, namespace, tag, authoritytag, cache, entity):
 
 def cache_to_cmdi(cache, cmdi, args):
     # traverse through all namespaces:tags and modify the CMDI
-    tag_l = tag_list(args.namespace_tag_list)
-    for prefix, tag, entity_type in tag_l:
+    for prefix, tag, entity_type, kind in tag_configuration(args.namespace_tag_list):
         namespace = get_namespace(cmdi, prefix)
-        cmdi = add_auth_ids(cmdi, namespace, tag, args.authoritative_tag, cache)
+        if namespace is None:
+            continue
+        extractor = get_extractor(kind, namespace, tag, args.authoritative_tag)
+        cmdi = add_auth_ids(cmdi, namespace, tag, args.authoritative_tag, cache, extractor, entity_type)
 
 
 def cmdi_to_string(cmdi):
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Imports the VIAF cluster dump (https://viaf.org/viaf/data/) or a local extract of it into a compact on-disk index,
+so that viaf_extractor.py can resolve names without network access.
+
+Supported input formats (plain or gzip'd):
+    lines   the format of the VIAF dump, one cluster per line, optionally prefixed by its ID and a tab:
+            <viaf id or URI>\t<ns1:VIAFCluster xmlns:ns1="http://viaf.org/viaf/terms#">...</ns1:VIAFCluster>
+    xml     one XML document containing VIAFCluster elements
+    tsv     columns viaf_id, name_type, headings, birth_date, nationalities, wiki_links; several headings,
+            nationalities or links are separated by '|'. A header line starting with 'viaf_id' is skipped.
+"""
+import argparse
+import gzip
+import os
+import re
+import sqlite3
+import threading
+
+from lxml import etree as ET
+from name_normalizer import normalize_name, strip_punctuation
+
+VIAF_TERMS = "http://viaf.org/viaf/terms#"
+# the name types that can be asked for in the namespaces_tags.csv
+NAME_TYPES = {"Personal", "Corporate", "Geographic"}
+# separates several values (nationalities, links) in one column of the index
+VALUE_SEPARATOR = "|"
+BATCH_SIZE = 10000
+
+# removes potential year numbers after a name, as in viaf_extractor.py
+name_regex = re.compile(r"(, )?[0-9]{3,}.*$")
+number = re.compile(r"\d+")
+
+
+def name_key(name, name_type):
+    """
+    Returns the key under which a name is looked up in the index. The trailing punctuation of headings (e.g. the
+    comma in the x400 'Hinrichs, Erhard,') is not part of the key, for all name types.
+    :param name_type: the name type, the names of persons are put into the order 'first name last name'
+    """
+    return normalize_name(strip_punctuation(name), name_type)
+
+
+def heading_key(heading, name_type):
+    """
+    Returns the key under which a VIAF heading (e.g. 'Hinrichs, Erhard, 1953-') is stored in the index
+    :param name_type: the name type of the cluster, the headings of persons are put into the order 'first name last
+    name'
+    """
+    return name_key(re.sub(name_regex, "", heading), name_type)
+
+
+def split_values(values):
+    return [value for value in values.split(VALUE_SEPARATOR) if value]
+
+
+def open_dump(dump_path, binary=False):
+    if dump_path.endswith(".gz"):
+        return gzip.open(dump_path, "rb" if binary else "rt", encoding=None if binary else "utf-8")
+    return open(dump_path, "rb") if binary else open(dump_path, encoding="utf-8")
+
+
+def parse_cluster(cluster):
+    """
+    Extracts the information needed by the index from a VIAFCluster element
+    :param cluster: the VIAFCluster as element tree
+    :return: a tuple (viaf_id, name_type, main headings, alternative headings, birth date, nationalities, wikipedia
+    links)
+    """
+    def texts(path):
+        return [el.text for el in cluster.iterfind(path, namespaces={"v": VIAF_TERMS}) if el.text]
+
+    viaf_id = cluster.findtext("{%s}viafID" % VIAF_TERMS)
+    name_type = cluster.findtext("{%s}nameType" % VIAF_TERMS)
+    headings = texts("v:mainHeadings/v:data/v:text")
+    alternatives = texts("v:x400s/v:x400/v:datafield/v:subfield[@code='a']")
+    birthdate = cluster.findtext("{%s}birthDate" % VIAF_TERMS)
+    nation = texts("v:nationalityOfEntity/v:data/v:text")
+    links = texts("v:xLinks/v:xLink[@type='Wikipedia']")
+    return viaf_id, name_type, headings, alternatives, birthdate, nation, links
+
+
+def read_lines(dump):
+    for line in dump:
+        line = line.strip()
+        if not line:
+            continue
+        # the VIAF dump prefixes every cluster with its ID
+        if not line.startswith("<"):
+            line = line.split("\t", 1)[-1]
+        try:
+            yield parse_cluster(ET.fromstring(line.encode("utf-8")))
+        except ET.XMLSyntaxError as e:
+            print("skipping invalid cluster: %s" % e)
+
+
+def read_xml(dump):
+    for _, cluster in ET.iterparse(dump, tag="{%s}VIAFCluster" % VIAF_TERMS):
+        yield parse_cluster(cluster)
+        # free the memory of the clusters that have been read
+        cluster.clear()
+        while cluster.getprevious() is not None:
+            del cluster.getparent()[0]
+
+
+def read_tsv(dump):
+    for line in dump:
+        columns = line.rstrip("\n").split("\t")
+        if not columns[0] or columns[0] == "viaf_id":
+            continue
+        columns += [""] * (6 - len(columns))
+        viaf_id, name_type, headings, birthdate, nation, links = columns[:6]
+        yield (viaf_id, name_type, split_values(headings), [], birthdate or None,
+               split_values(nation), split_values(links))
+
+
+READERS = {"lines": read_lines, "xml": read_xml, "tsv": read_tsv}
+
+
+def guess_format(dump_path):
+    """
+    Guesses the format of a dump from its file name and its first line
+    :return: 'lines', 'xml' or 'tsv'
+    """
+    if ".tsv" in dump_path or ".csv" in dump_path:
+        return "tsv"
+    with open_dump(dump_path) as dump:
+        line = ""
+        for line in dump:
+            line = line.strip()
+            if line:
+                break
+    # in the line format, every line is a complete cluster (optionally prefixed by its ID)
+    if not line.startswith("<") or (re.match(r"<(\w+:)?VIAFCluster[\s>]", line) and
+                                    re.search(r"</(\w+:)?VIAFCluster>$", line)):
+        return "lines"
+    return "xml"
+
+
+def import_dump(dump_path, index_path, dump_format=None, name_types=NAME_TYPES):
+    """
+    Streams a VIAF dump into an index. An existing index is extended: the clusters of the dump replace the clusters
+    with the same ID (including all their names), the other clusters are kept.
+    :param dump_path: the path to the dump (can be gzip'd)
+    :param index_path: the path of the index (an SQLite database)
+    :param dump_format: 'lines', 'xml' or 'tsv'; guessed from the file name and the first line if None
+    :param name_types: only clusters of these name types are imported
+    :return: the number of imported clusters
+    """
+    dump_format = dump_format or guess_format(dump_path)
+    reader = READERS[dump_format]
+    connection = sqlite3.connect(index_path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute("CREATE TABLE IF NOT EXISTS names (key TEXT, name_type TEXT, main INTEGER, viaf_id TEXT)")
+    connection.execute("CREATE TABLE IF NOT EXISTS clusters (viaf_id TEXT PRIMARY KEY, birthdate TEXT, "
+                       "nationalities TEXT, wiki_links TEXT)")
+    # the names of a cluster are replaced when it is imported again, this needs an index on the IDs
+    connection.execute("CREATE INDEX IF NOT EXISTS names_viaf_id ON names (viaf_id)")
+    # the lookup index is created after the import, which is much faster than updating it for every row
+    connection.execute("DROP INDEX IF EXISTS names_key")
+
+    count = 0
+    # the clusters of a batch, VIAF ID -> (names, cluster)
+    batch = {}
+    with open_dump(dump_path, binary=dump_format == "xml") as dump:
+        for viaf_id, name_type, headings, alternatives, birthdate, nation, links in reader(dump):
+            if not viaf_id or name_type not in name_types:
+                continue
+            id_number = re.search(number, viaf_id)
+            if id_number is None:
+                print("skipping cluster with invalid ID %s" % viaf_id)
+                continue
+            viaf_id = str(int(id_number.group(0)))
+            names = []
+            keys = set()
+            for main, heading_list in [(1, headings), (0, alternatives)]:
+                for heading in heading_list:
+                    key = heading_key(heading, name_type)
+                    if key and key not in keys:
+                        keys.add(key)
+                        names.append((key, name_type, main, viaf_id))
+            # a cluster that occurs several times in the dump is only imported once
+            if viaf_id not in batch:
+                count += 1
+            batch[viaf_id] = (names, (viaf_id, birthdate, VALUE_SEPARATOR.join(nation), VALUE_SEPARATOR.join(links)))
+            if len(batch) >= BATCH_SIZE:
+                _insert(connection, batch)
+                batch = {}
+    _insert(connection, batch)
+    connection.execute("CREATE INDEX names_key ON names (key, name_type)")
+    connection.commit()
+    connection.close()
+    return count
+
+
+def _insert(connection, batch):
+    # the names of clusters that are already in the index are replaced, not added to
+    connection.executemany("DELETE FROM names WHERE viaf_id = ?", [(viaf_id,) for viaf_id in batch])
+    connection.executemany("INSERT INTO names VALUES (?, ?, ?, ?)",
+                           [name for names, _ in batch.values() for name in names])
+    connection.executemany("INSERT OR REPLACE INTO clusters VALUES (?, ?, ?, ?)",
+                           [cluster for _, cluster in batch.values()])
+
+
+class ViafIndex:
+
+    def __init__(self, index_path):
+        """
+        This class gives read access to an index created by import_dump
+        :param index_path: the path of the index (an SQLite database)
+        """
+        if not os.path.exists(index_path):
+            raise IOError("the VIAF index %s does not exist, create it with viaf_dump.py" % index_path)
+        self._index_path = index_path
+        self._connection = sqlite3.connect("file:%s?mode=ro" % index_path, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def lookup(self, name, name_type):
+        """
+        This method returns the IDs of all clusters whose main heading or alternative name matches the given name
+        :param name: [String] the name of the entity, e.g. Erhard Hinrichs
+        :param name_type: "Personal", "Corporate" or "Geographic"
+        :return: a list of VIAF IDs (Strings), matches of the main heading first
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT viaf_id FROM names WHERE key = ? AND name_type = ? ORDER BY main DESC, rowid",
+                (name_key(name, name_type), name_type)).fetchall()
+        ids = []
+        for (viaf_id,) in rows:
+            if viaf_id not in ids:
+                ids.append(viaf_id)
+        return ids
+
+    def get_information(self, viaf_id):
+        """
+        This method returns the information stored for a cluster, in the form returned by
+        viaf_extractor.extract_information
+        :param viaf_id: [String] the VIAF ID
+        :return: a tuple (birthdate, wikipedia links, nationalities), (None, (), frozenset()) if the ID is not in the
+        index
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT birthdate, nationalities, wiki_links FROM clusters WHERE viaf_id = ?", (viaf_id,)).fetchone()
+        if row is None:
+            return None, (), frozenset()
+        birthdate, nation, links = row
+        return birthdate, tuple(split_values(links)), frozenset(split_values(nation))
+
+    def get_information_batch(self, viaf_ids):
+        """
+        This method returns the information stored for several clusters at once
+        :param viaf_ids: a list of VIAF IDs (Strings)
+        :return: a dictionary, VIAF ID -> tuple (birthdate, wikipedia links, nationalities), see get_information
+        """
+        viaf_ids = list(viaf_ids)
+        results = {viaf_id: (None, (), frozenset()) for viaf_id in viaf_ids}
+        # SQLite limits the number of parameters of a query
+        for start in range(0, len(viaf_ids), 500):
+            chunk = viaf_ids[start:start + 500]
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT viaf_id, birthdate, nationalities, wiki_links FROM clusters WHERE viaf_id IN (%s)" %
+                    ",".join("?" * len(chunk)), chunk).fetchall()
+            for viaf_id, birthdate, nation, links in rows:
+                results[viaf_id] = birthdate, tuple(split_values(links)), frozenset(split_values(nation))
+        return results
+
+    def close(self):
+        self._connection.close()
+
+    @property
+    def index_path(self):
+        return self._index_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dump", type=str, help="the VIAF cluster dump or a local extract of it (can be gzip'd)")
+    parser.add_argument("index", type=str, help="the path of the index that is created (or extended)")
+    parser.add_argument("--format", type=str, choices=sorted(READERS), default=None,
+                        help="the format of the dump, guessed from the file name and the first line if not given")
+    parser.add_argument("--name_types", type=str, nargs="+", default=sorted(NAME_TYPES),
+                        help="only clusters of these name types are imported")
+    args = parser.parse_args()
+
+    count = import_dump(args.dump, args.index, dump_format=args.format, name_types=set(args.name_types))
+    print("%d clusters imported to %s" % (count, args.index))
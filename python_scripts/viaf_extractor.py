@@ -1,19 +1,77 @@
 #!/usr/bin/env python3
 
-import requests
 import xml.etree.ElementTree as et
 import re
 import json
+import os
+import threading
 import unicodedata as unicode
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from name_normalizer import reorder_name
+
+# the VIAF server to query, can be pointed to a local stub (see benchmarks/viaf_stub.py)
+VIAF_URL = os.environ.get("BIODATANER_VIAF_URL", "https://viaf.org").rstrip("/")
+# a local index of the VIAF dump (see viaf_dump.py), if it is set names are resolved without querying VIAF
+VIAF_INDEX = os.environ.get("BIODATANER_VIAF_INDEX")
+_viaf_index = None
+# the number of viaf.xml files that are requested at the same time
+FETCH_WORKERS = 8
+# the number of clusters whose information is kept in memory
+INFORMATION_CACHE_SIZE = 100000
+_information = OrderedDict()
+_information_lock = threading.Lock()
+# requests is imported on first use, so that importing this module (e.g. by cmdi_extractor.py) stays fast
+_session = None
+_session_lock = threading.Lock()
+# marks information of a Candidate that has not been fetched yet
+NOT_FETCHED = object()
 
 
 class Candidate:
-    def __init__(self, viaf_id, name, birthyear, wiki_links, nation):
+    # many thousands of candidates are kept when large batches are resolved, slots keep them small
+    __slots__ = ("viaf_id", "name", "_birthyear", "_wiki_links", "_nation", "batch")
+
+    def __init__(self, viaf_id, name, birthyear=NOT_FETCHED, wiki_links=NOT_FETCHED, nation=NOT_FETCHED, batch=None):
         self.viaf_id = viaf_id  # str
         self.name = name  # the name (as it appears in the dataset)
-        self.birthyear = birthyear  # str
-        self.wiki_links = wiki_links  # list with wikipedia links
-        self.nation = nation  # set
+        self._birthyear = birthyear  # str
+        self._wiki_links = wiki_links  # tuple with wikipedia links
+        self._nation = nation  # frozenset
+        # the IDs whose information is fetched together with this one (the other candidates for the same name)
+        self.batch = batch
+
+    def _fetch(self):
+        # the information is only fetched when it is used, together with the information of the whole batch
+        information = fetch_information(self.batch or [self.viaf_id])[self.viaf_id]
+        # only a failure to fetch the information of this candidate is raised, not those of the rest of the batch
+        if isinstance(information, Exception):
+            raise information
+        birthyear, wiki_links, nation = information
+        if self._birthyear is NOT_FETCHED:
+            self._birthyear = birthyear
+        if self._wiki_links is NOT_FETCHED:
+            self._wiki_links = wiki_links
+        if self._nation is NOT_FETCHED:
+            self._nation = nation
+
+    @property
+    def birthyear(self):
+        if self._birthyear is NOT_FETCHED:
+            self._fetch()
+        return self._birthyear
+
+    @property
+    def wiki_links(self):
+        if self._wiki_links is NOT_FETCHED:
+            self._fetch()
+        return self._wiki_links
+
+    @property
+    def nation(self):
+        if self._nation is NOT_FETCHED:
+            self._fetch()
+        return self._nation
 
     def __repr__(self):
         return str(self.viaf_id) + " : " + self.name
@@ -21,6 +79,95 @@ class Candidate:
     def __eq__(self, other):
         return self.__class__ == other.__class__ and self.viaf_id == other.viaf_id
 
+    def __hash__(self):
+        return hash(self.viaf_id)
+
+    def to_tuple(self):
+        """Returns a compact representation of the candidate that can be stored or sent to other processes
+        Returns: (viaf_id, name) if the information has not been fetched yet, else
+                 (viaf_id, name, birthyear, wiki_links, nation)
+        """
+        if NOT_FETCHED in (self._birthyear, self._wiki_links, self._nation):
+            return self.viaf_id, self.name
+        return self.viaf_id, self.name, self._birthyear, tuple(self._wiki_links), tuple(self._nation)
+
+    @classmethod
+    def from_tuple(cls, record, batch=None):
+        """Creates a candidate from the representation returned by to_tuple
+        """
+        if len(record) == 2:
+            return cls(record[0], record[1], batch=batch)
+        viaf_id, name, birthyear, wiki_links, nation = record
+        return cls(viaf_id, name, birthyear, tuple(wiki_links), frozenset(nation), batch=batch)
+
+    def __reduce__(self):
+        return Candidate.from_tuple, (self.to_tuple(), self.batch)
+
+
+def candidates_to_tuples(candidates):
+    """Returns the compact representation (see Candidate.to_tuple) of a list of candidates
+    """
+    return [c.to_tuple() for c in candidates]
+
+
+def candidates_from_tuples(records):
+    """Creates the candidates for a list of compact representations (see Candidate.to_tuple); their information
+    is fetched together, as for the results of extract_viaf_id
+    """
+    batch = [record[0] for record in records]
+    return [Candidate.from_tuple(record, batch=batch) for record in records]
+
+
+def get_session():
+    """Returns the HTTP session used for all requests to VIAF (created on first use)
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                _session = requests.Session()
+    return _session
+
+
+def use_viaf_index(index_path):
+    """Resolve names against a local index created by viaf_dump.py instead of querying VIAF
+    Parameters:
+    -----------
+    index_path: path to the index, None to query VIAF again
+    """
+    global VIAF_INDEX, _viaf_index
+    if _viaf_index is not None:
+        _viaf_index.close()
+    VIAF_INDEX = index_path
+    _viaf_index = None
+    clear_information_cache()
+
+
+def get_viaf_index():
+    """Returns the local VIAF index (opened on first use) or None if names are resolved online
+    """
+    global _viaf_index
+    if _viaf_index is None and VIAF_INDEX:
+        from viaf_dump import ViafIndex
+        _viaf_index = ViafIndex(VIAF_INDEX)
+    return _viaf_index
+
+
+def extract_viaf_id_offline(authority_name, authority_type, viaf_index):
+    """Extract Viaf IDs for given authority_name from a local index of the VIAF dump
+    Parameters:
+    -----------
+    authority_name: given name to search ID
+    authority_type: Type to search for ("Personal", "Geographic" or "Corporate")
+    viaf_index: the ViafIndex to search in
+    Returns: results, list with (at most 10) Candidates for given name
+    """
+    # the index ignores trailing punctuation (e.g. 'Erhard Hinrichs.'), unlike the online search no shortened name is
+    # tried: it would be the key of another name
+    viaf_ids = viaf_index.lookup(authority_name, authority_type)
+    return [Candidate(viaf_id, authority_name) for viaf_id in viaf_ids[:10]]
+
 
 def extract_viaf_id(authority_name, authority_type):
     """Extract Viaf IDs for given authority_name
@@ -31,14 +178,34 @@ def extract_viaf_id(authority_name, authority_type):
                     "Personal" to search for a Person ID
                     "Geographic" to search for a Location ID
                     "Corporate" to search for an Organization ID
-    Returns: results, list with all IDs for given name
+    Returns: results, list with all IDs for given name. The birthyear, wiki_links and nation of the Candidates are
+             fetched (for all of them at once) when they are used for the first time
+    """
+    viaf_index = get_viaf_index()
+    if viaf_index is not None:
+        results = extract_viaf_id_offline(authority_name, authority_type, viaf_index)
+    else:
+        results = extract_viaf_id_online(authority_name, authority_type)
+    batch = [c.viaf_id for c in results]
+    for c in results:
+        c.batch = batch
+    return results
+
+
+def extract_viaf_id_online(authority_name, authority_type):
+    """Extract Viaf IDs for given authority_name by querying VIAF (SRU search, AutoSuggest and full search)
+    Parameters:
+    -----------
+    authority_name: given name to search ID
+    authority_type: Type to search for ("Personal", "Geographic" or "Corporate")
+    Returns: results, list with (at most 10) Candidates for given name
     """
     # authority_type: Personal=Person, Geographic=Location, Org=Corporate
-    base_url = "https://viaf.org/viaf/search?sortKeys=holdingscount&httpAccept=text/xml&recordSchema=http://viaf.org" \
+    base_url = VIAF_URL + "/viaf/search?sortKeys=holdingscount&httpAccept=text/xml&recordSchema=http://viaf.org" \
                "/BriefVIAFCluster&maximumRecords=250&query=local.mainHeadingEl%20all%20%22"
     url = ''.join([base_url, authority_name, "%22"])
 
-    r = requests.get(url)
+    r = get_session().get(url)
     xml_content = r.text
 
     tree = et.ElementTree(et.fromstring(xml_content))
@@ -47,6 +214,8 @@ def extract_viaf_id(authority_name, authority_type):
     name_regex = re.compile(r"(, )?[0-9]{3,}.*$")  # regex to remove potential year numbers after a name
     candidate_count = 0
     results = []
+    # the IDs of the results, every ID is only returned once (e.g. AutoSuggest can return an ID for several terms)
+    found_ids = set()
 
     # search for name using SRU Search
     for record in root.findall(".//{http://www.loc.gov/zing/srw/}record"):
@@ -63,25 +232,24 @@ def extract_viaf_id(authority_name, authority_type):
                 name_mod = re.sub(name_regex, "", name.text)
 
                 # put last and first name in the correct order (first_name last_name)
-                if ',' in name_mod:
-                    tmp_name = name_mod.split(',')
-                    name_mod = tmp_name[1].strip() + " " + tmp_name[0].strip()
+                name_mod = reorder_name(name_mod)
 
                 if unicode.normalize('NFC', name_mod) == authority_name or unicode.normalize('NFC',
                                                                                              name_mod) == \
                         authority_name[
                         :-1]:
                     candidate_count += 1
-                    tmp_tuple = extract_information(viaf_id)
-                    results.append(Candidate(viaf_id, authority_name, tmp_tuple[0], tmp_tuple[1], tmp_tuple[2]))
+                    if viaf_id not in found_ids:
+                        found_ids.add(viaf_id)
+                        results.append(Candidate(viaf_id, authority_name))
                     break
 
     # if search via xml not successful, try AutoSuggest
     if candidate_count == 0:
-        base_url = "http://viaf.org/viaf/AutoSuggest?query="
+        base_url = VIAF_URL + "/viaf/AutoSuggest?query="
         url = ''.join([base_url, authority_name])
 
-        r = requests.get(url)
+        r = get_session().get(url)
         data = json.loads(r.text)
 
         if data["result"]:
@@ -92,23 +260,21 @@ def extract_viaf_id(authority_name, authority_type):
                 name_mod = re.sub(name_regex, "", name).strip()
 
                 # put last and first name in the correct order (first_name last_name)
-                if ',' in name_mod:
-                    tmp_name = name_mod.split(',')
-                    name_mod = tmp_name[1].strip() + " " + tmp_name[0].strip()
+                name_mod = reorder_name(name_mod)
 
                 if (unicode.normalize('NFC', name_mod) == authority_name or unicode.normalize('NFC',
                                                                                               name_mod) ==
                     authority_name[
                     :-1]) and \
-                        record["nametype"] == authority_type.lower():
-                    tmp_tuple = extract_information(viaf_id)
-                    results.append(Candidate(viaf_id, authority_name, tmp_tuple[0], tmp_tuple[1], tmp_tuple[2]))
+                        record["nametype"] == authority_type.lower() and viaf_id not in found_ids:
+                    found_ids.add(viaf_id)
+                    results.append(Candidate(viaf_id, authority_name))
 
     # experimental, try full search
-    base_url = "http://viaf.org/viaf/search?&sortKeys=holdingscount&httpAccept=text/xml&query=local.names%20all%20%22"
+    base_url = VIAF_URL + "/viaf/search?&sortKeys=holdingscount&httpAccept=text/xml&query=local.names%20all%20%22"
     url = ''.join([base_url, authority_name, "\""])
 
-    r = requests.get(url)
+    r = get_session().get(url)
     xml_content = r.text
     tree = et.ElementTree(et.fromstring(xml_content))
     root = tree.getroot()
@@ -133,20 +299,17 @@ def extract_viaf_id(authority_name, authority_type):
                         name_mod = re.sub(name_regex, "", name.text)
 
                         # put last and first name in the correct order (first_name last_name)
-                        if ',' in name_mod:
-                            tmp_name = name_mod.split(',')
-                            name_mod = tmp_name[1].strip() + " " + tmp_name[0].strip()
+                        name_mod = reorder_name(name_mod)
 
                         if unicode.normalize('NFC', name_mod) == authority_name or unicode.normalize('NFC',
                                                                                                      name_mod) == \
                                 authority_name[
                                 :-1]:
                             candidate_count += 1
-                            tmp_tuple = extract_information(viaf_id)
-                            c = Candidate(viaf_id, authority_name, tmp_tuple[0], tmp_tuple[1], tmp_tuple[2])
 
-                            if c not in results:
-                                results.append(c)
+                            if viaf_id not in found_ids:
+                                found_ids.add(viaf_id)
+                                results.append(Candidate(viaf_id, authority_name))
                             break
 
                 if cur_cand_count != candidate_count:
@@ -157,16 +320,80 @@ def extract_viaf_id(authority_name, authority_type):
 
 def extract_information(viaf_id):
     """Extract various informations such as birthday, nationality or wikipedia links for a given viaf_id
+    Returns: a tuple (birthdate, tuple with wikipedia links, frozenset with nationalities)
+    """
+    information = fetch_information([viaf_id])[viaf_id]
+    if isinstance(information, Exception):
+        raise information
+    return information
+
+
+def fetch_information(viaf_ids):
+    """Extract the information (see extract_information) for several viaf_ids at once. The results are memoized,
+    only IDs that were not fetched before are requested (FETCH_WORKERS at the same time). Every ID is fetched on its
+    own: if the request for one ID fails, the information of the others is still returned and memoized
+    Parameters:
+    -----------
+    viaf_ids: iterable of viaf_ids
+    Returns: dictionary, viaf_id -> (birthdate, tuple with wikipedia links, frozenset with nationalities), or the
+    exception raised while fetching the information of the ID (it is not memoized, so it is requested again)
+    """
+    results = {}
+    missing = []
+    with _information_lock:
+        for viaf_id in dict.fromkeys(viaf_ids):
+            if viaf_id in _information:
+                results[viaf_id] = _information[viaf_id]
+                _information.move_to_end(viaf_id)
+            else:
+                missing.append(viaf_id)
+    if not missing:
+        return results
+
+    viaf_index = get_viaf_index()
+    if viaf_index is not None:
+        fetched = viaf_index.get_information_batch(missing)
+    elif len(missing) == 1:
+        fetched = {missing[0]: _try_request_information(missing[0])}
+    else:
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(missing))) as pool:
+            fetched = dict(zip(missing, pool.map(_try_request_information, missing)))
+
+    with _information_lock:
+        _information.update((viaf_id, information) for viaf_id, information in fetched.items()
+                            if not isinstance(information, Exception))
+        while len(_information) > INFORMATION_CACHE_SIZE:
+            _information.popitem(last=False)
+    results.update(fetched)
+    return results
+
+
+def clear_information_cache():
+    """Forget all memoized information (see fetch_information)
     """
-    url = "https://viaf.org/viaf/" + viaf_id + "/viaf.xml"
-    r = requests.get(url)
+    with _information_lock:
+        _information.clear()
+
+
+def _try_request_information(viaf_id):
+    """Returns the information of a viaf_id (see _request_information) or the exception raised while requesting it
+    """
+    try:
+        return _request_information(viaf_id)
+    except Exception as e:
+        return e
+
+
+def _request_information(viaf_id):
+    url = VIAF_URL + "/viaf/" + viaf_id + "/viaf.xml"
+    r = get_session().get(url)
     xml_content = r.text
 
     tree = et.ElementTree(et.fromstring(xml_content))
     root = tree.getroot()
 
     # get birthyear
-    birthdate = root.find(".//{http://viaf.org/viaf/terms#}birthDate").text
+    birthdate = root.findtext(".//{http://viaf.org/viaf/terms#}birthDate")
 
     # get nationality
     nation = set()
@@ -179,4 +406,4 @@ def extract_information(viaf_id):
     for link in root.findall(".//{http://viaf.org/viaf/terms#}xLink[@type='Wikipedia']"):
         links.append(link.text)
 
-    return (birthdate, links, nation)
+    return (birthdate, tuple(links), frozenset(nation))
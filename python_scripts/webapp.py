@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from flask import Flask, Response, request
 
-import os, sys
+import gc, os, sys, threading
 # add local files in the module path; uwsgi doesn't work otherwise
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -21,10 +21,32 @@ class Args:
     cmdi_files = "data/"
 
 args = Args();
-cache = EntityCache(filepath=args.path_to_cache, 
-                    delimiter=args.delimiter,
-                    specification=args.specification,
-                    create_new=args.new_cache)
+# the cache is loaded on the first request (see get_cache), or at import time when BIODATANER_PRELOAD_CACHE is set
+cache = None
+cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the cache, it is read from args.path_to_cache when it is needed for the first time
+    """
+    global cache
+    if cache is None:
+        with cache_lock:
+            if cache is None:
+                cache = EntityCache(filepath=args.path_to_cache,
+                                    delimiter=args.delimiter,
+                                    specification=args.specification,
+                                    create_new=args.new_cache)
+    return cache
+
+
+# e.g. BIODATANER_PRELOAD_CACHE=1; an empty value, 0, false, no and off keep the cache from being preloaded
+if os.environ.get("BIODATANER_PRELOAD_CACHE", "").strip().lower() not in ("", "0", "false", "no", "off"):
+    # load the cache before uwsgi forks its workers (without --lazy-apps), so that they share its memory
+    # copy-on-write; freezing keeps the garbage collector from touching (and so copying) the loaded objects
+    get_cache()
+    gc.freeze()
 
 app = Flask(__name__)
  
@@ -49,6 +71,7 @@ def biodataner():
         return Response("Accepts only application/xml", status=400)
 
     cmdi = read_cmdi_fromsource(request.data)
+    cache = get_cache()
     cmdi_to_cache(cmdi, cache, args)
     cache_to_cmdi(cache, cmdi, args);
     return Response(cmdi_to_string(cmdi), status=200)
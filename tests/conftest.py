@@ -0,0 +1,6 @@
+import os
+import sys
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the scripts import each other as top-level modules
+sys.path.insert(0, os.path.join(REPOSITORY_DIR, "python_scripts"))
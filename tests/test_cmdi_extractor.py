@@ -0,0 +1,48 @@
+import argparse
+import os
+
+from lxml import etree as ET
+
+from conftest import REPOSITORY_DIR
+from cmdi_extractor import cmdi_to_cache, tag_configuration, tag_list
+from entity_cache import EntityCache
+
+CMDI = b"""<cmd:CMD xmlns:cmd="http://www.clarin.eu/cmd/1" xmlns:cmdp="http://www.clarin.eu/cmd/1/profiles/test">
+  <cmd:Components><cmdp:Person><cmdp:name>Hinrichs, Erhard</cmdp:name></cmdp:Person></cmd:Components>
+</cmd:CMD>"""
+
+
+def test_variant_spellings_are_stored_as_aliases(tmp_path):
+    cache = EntityCache(filepath=str(tmp_path / "cache.csv"), delimiter="\t",
+                        specification=os.path.join(REPOSITORY_DIR, "entity_spec.json"), create_new=True)
+    cache.enter_entity("Erhard Hinrichs")
+    cache.enter_verified_viaf("Erhard Hinrichs", "123")
+    args = argparse.Namespace(namespace_tag_list=os.path.join(REPOSITORY_DIR, "namespaces_tags.csv"),
+                              authoritative_tag="AuthoritativeID")
+    cmdi_to_cache(ET.fromstring(CMDI), cache, args)
+    assert cache.size == 1
+    assert cache.get_aliases("Erhard Hinrichs") == ["Hinrichs, Erhard"]
+    assert cache.get_entity_verified_viaf("Hinrichs, Erhard").item() == "123"
+
+
+def test_entering_a_known_entity_does_not_add_an_alias(tmp_path):
+    cache = EntityCache(filepath=str(tmp_path / "cache.csv"), delimiter="\t",
+                        specification=os.path.join(REPOSITORY_DIR, "entity_spec.json"), create_new=True)
+    cache.enter_entity("Erhard Hinrichs")
+    cache.enter_entity("Erhard  Hinrichs")
+    assert cache.size == 1
+    assert cache.get_aliases("Erhard Hinrichs") == []
+
+
+def test_tag_configuration_is_parsed_once(tmp_path):
+    path = tmp_path / "namespaces_tags.csv"
+    path.write_text("cmdp\tPerson\tPersonal\ncmdp\tOrganisation\tCorporate\torganisation", encoding="utf-8")
+    configuration = tag_configuration(str(path))
+    assert configuration == (("cmdp", "Person", "Personal", "generic"),
+                             ("cmdp", "Organisation", "Corporate", "organisation"))
+    assert tag_configuration(str(path)) is configuration
+    assert tag_list(str(path)) == [("cmdp", "Person", "Personal"), ("cmdp", "Organisation", "Corporate")]
+    # a modified file is read again
+    path.write_text("cmdp\tAuthor\tPersonal", encoding="utf-8")
+    os.utime(str(path), (0, 0))
+    assert tag_configuration(str(path)) == (("cmdp", "Author", "Personal", "generic"),)
@@ -0,0 +1,42 @@
+import os
+
+from conftest import REPOSITORY_DIR
+from entity_cache import EntityCache
+
+
+def new_cache(tmp_path):
+    return EntityCache(filepath=str(tmp_path / "cache.csv"), delimiter="\t",
+                       specification=os.path.join(REPOSITORY_DIR, "entity_spec.json"), create_new=True)
+
+
+def test_variant_spellings_find_the_entry(tmp_path):
+    cache = new_cache(tmp_path)
+    cache.enter_entity("Erhard Hinrichs")
+    cache.enter_verified_viaf("Erhard Hinrichs", "123")
+    assert cache.get_entity_verified_viaf("erhard  HINRICHS").item() == "123"
+    assert cache.resolve_name("Hinrichs, Erhard", "Personal") == "Erhard Hinrichs"
+    assert not cache.has_entry("Hinrichs, Erhard")
+
+
+def test_departments_do_not_get_the_id_of_their_parent(tmp_path):
+    parent = "Universität Tübingen, Seminar für Sprachwissenschaft"
+    department = parent + ", Abteilung Computerlinguistik"
+    cache = new_cache(tmp_path)
+    cache.enter_entity(parent)
+    cache.enter_verified_viaf(parent, "123")
+    assert not cache.has_entry(department)
+    assert cache.resolve_name(department, "Corporate") == department
+    cache.enter_entity(department)
+    assert not cache.has_verified_viaf(department)
+
+
+def test_aliases_are_stored_and_used(tmp_path):
+    cache = new_cache(tmp_path)
+    cache.enter_entity("Erhard Hinrichs")
+    cache.enter_alias("Hinrichs, Erhard", "Erhard Hinrichs")
+    assert cache.get_aliases("Erhard Hinrichs") == ["Hinrichs, Erhard"]
+    assert cache.get_index("Hinrichs, Erhard") == cache.get_index("Erhard Hinrichs")
+    cache.write_cache()
+    reloaded = EntityCache(filepath=cache.filepath, delimiter="\t",
+                           specification=os.path.join(REPOSITORY_DIR, "entity_spec.json"))
+    assert reloaded.has_entry("Hinrichs, Erhard")
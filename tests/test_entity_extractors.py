@@ -0,0 +1,44 @@
+from lxml import etree as ET
+
+from cmdi_extractor import get_name, get_names_with_ids
+from entity_extractors import get_extractor
+
+NAMESPACE = "http://www.clarin.eu/cmd/1/profiles/test"
+CMDI = """<cmd:CMD xmlns:cmd="http://www.clarin.eu/cmd/1" xmlns:cmdp="http://www.clarin.eu/cmd/1/profiles/test">
+  <cmd:Components>
+    <cmdp:Person>
+      <cmdp:firstName>Erhard</cmdp:firstName>
+      <cmdp:lastName>Hinrichs</cmdp:lastName>
+      <cmdp:AuthoritativeIDs>
+        <cmdp:AuthoritativeID>
+          <cmdp:id>http://viaf.org/viaf/0123</cmdp:id>
+          <cmdp:issuingAuthority>VIAF</cmdp:issuingAuthority>
+        </cmdp:AuthoritativeID>
+      </cmdp:AuthoritativeIDs>
+    </cmdp:Person>
+    <cmdp:Person>Thorsten Trippel</cmdp:Person>
+    <cmdp:Person><cmdp:lastName>Zinsmeister</cmdp:lastName><cmdp:firstName>Heike</cmdp:firstName></cmdp:Person>
+    <cmdp:Organisation>
+      <cmdp:name>Universität Tübingen</cmdp:name>
+      <cmdp:fundingAgency>DFG</cmdp:fundingAgency>
+    </cmdp:Organisation>
+  </cmd:Components>
+</cmd:CMD>"""
+
+
+def test_generic_extractor_finds_the_names_of_get_names_with_ids():
+    cmdi = ET.fromstring(CMDI.encode("utf-8"))
+    for tag in ["Person", "Organisation"]:
+        extractor = get_extractor("generic", NAMESPACE, tag, "AuthoritativeID")
+        assert extractor.extract(cmdi) == get_names_with_ids(cmdi, NAMESPACE, tag, "AuthoritativeID")
+    names, name2viaf = get_extractor("generic", NAMESPACE, "Person", "AuthoritativeID").extract(cmdi)
+    assert names == {"Erhard Hinrichs", "Thorsten Trippel", "Zinsmeister Heike"}
+    assert name2viaf == {"Erhard Hinrichs": "123"}
+
+
+def test_generic_extractor_finds_the_names_of_get_name():
+    cmdi = ET.fromstring(CMDI.encode("utf-8"))
+    for tag in ["Person", "Organisation"]:
+        extractor = get_extractor("generic", NAMESPACE, tag, "AuthoritativeID")
+        for entity in cmdi.iter("{%s}%s" % (NAMESPACE, tag)):
+            assert extractor.name(entity, text=False) == get_name(entity)
@@ -0,0 +1,40 @@
+import unicodedata
+
+from name_normalizer import normalize_name, reorder_name
+
+
+def test_unicode_form_case_and_whitespace_are_folded():
+    name = "Jürgen  Müller"
+    assert normalize_name(unicodedata.normalize("NFC", name)) == "jurgen muller"
+    assert normalize_name(unicodedata.normalize("NFD", name)) == "jurgen muller"
+    assert normalize_name(" JÜRGEN\tmüller ") == "jurgen muller"
+
+
+def test_personal_names_are_reordered():
+    assert normalize_name("Hinrichs, Erhard", "Personal") == normalize_name("Erhard Hinrichs")
+    assert normalize_name("Hinrichs, Erhard") == "hinrichs, erhard"
+
+
+def test_viaf_headings_are_reordered():
+    assert reorder_name("Hinrichs, Erhard,") == "Erhard Hinrichs"
+    assert reorder_name("Hinrichs, E.") == "E. Hinrichs"
+    assert reorder_name("Smith, John, Jr.") == "John Smith"
+    assert reorder_name("Erhard Hinrichs") == "Erhard Hinrichs"
+
+
+def test_trailing_punctuation_of_personal_names_is_folded():
+    assert normalize_name("Hinrichs, Erhard,", "Personal") == "erhard hinrichs"
+    assert normalize_name("Hinrichs, Erhard.", "Personal") == "erhard hinrichs"
+    assert normalize_name("Hinrichs, E.", "Personal") == normalize_name("E. Hinrichs", "Personal")
+
+
+def test_names_with_several_commas_keep_all_parts():
+    assert normalize_name("Müller, Hans, Jr.", "Personal") == "muller, hans, jr"
+    assert normalize_name("Müller, Hans, Jr.", "Personal") != normalize_name("Hans Müller", "Personal")
+
+
+def test_organisations_do_not_collide():
+    department = "Universität Tübingen, Seminar für Sprachwissenschaft, Abteilung Computerlinguistik"
+    parent = "Universität Tübingen, Seminar für Sprachwissenschaft"
+    assert normalize_name(department, "Corporate") != normalize_name(parent, "Corporate")
+    assert normalize_name("ACME, Inc.", "Corporate") != normalize_name("Inc. ACME", "Corporate")
@@ -0,0 +1,74 @@
+import gzip
+
+from viaf_dump import guess_format, import_dump, ViafIndex
+
+CLUSTER = ('<ns1:VIAFCluster xmlns:ns1="http://viaf.org/viaf/terms#"><ns1:viafID>%s</ns1:viafID>'
+           '<ns1:nameType>%s</ns1:nameType><ns1:mainHeadings>%s</ns1:mainHeadings><ns1:x400s>%s</ns1:x400s>'
+           '</ns1:VIAFCluster>')
+HEADING = '<ns1:data><ns1:text>%s</ns1:text></ns1:data>'
+X400 = ('<ns1:x400><ns1:datafield dtype="MARC21" tag="400"><ns1:subfield code="a">%s</ns1:subfield>'
+        '<ns1:subfield code="d">1953-</ns1:subfield></ns1:datafield></ns1:x400>')
+
+
+def cluster(viaf_id, *headings, alternatives=(), name_type="Personal"):
+    return CLUSTER % (viaf_id, name_type, "".join(HEADING % heading for heading in headings),
+                      "".join(X400 % alternative for alternative in alternatives))
+
+
+def write(path, text):
+    with gzip.open(str(path), "wt", encoding="utf-8") as out_f:
+        out_f.write(text)
+    return str(path)
+
+
+def test_guess_format(tmp_path):
+    lines = write(tmp_path / "clusters.gz", "\n".join(["123\t" + cluster("123", "Hinrichs, Erhard"),
+                                                       cluster("456", "Trippel, Thorsten")]))
+    xml = write(tmp_path / "clusters.xml.gz", '<?xml version="1.0"?>\n<ns1:VIAFClusters '
+                'xmlns:ns1="http://viaf.org/viaf/terms#">\n%s\n</ns1:VIAFClusters>' % cluster("123", "Hinrichs, E."))
+    xml_without_declaration = write(tmp_path / "root.gz", "<root>\n%s\n</root>" % cluster("123", "Hinrichs, E."))
+    assert guess_format(lines) == "lines"
+    assert guess_format(xml) == "xml"
+    assert guess_format(xml_without_declaration) == "xml"
+    assert guess_format(str(tmp_path / "clusters.tsv")) == "tsv"
+
+
+def test_import_xml_document(tmp_path):
+    dump = write(tmp_path / "clusters.xml.gz", '<?xml version="1.0"?>\n<ns1:VIAFClusters '
+                 'xmlns:ns1="http://viaf.org/viaf/terms#">\n%s\n%s\n</ns1:VIAFClusters>' % (
+                     cluster("123", "Hinrichs, Erhard, 1953-"), cluster("456", "Trippel, Thorsten")))
+    index_path = str(tmp_path / "index.sqlite")
+    assert import_dump(dump, index_path) == 2
+    index = ViafIndex(index_path)
+    assert index.lookup("Erhard Hinrichs", "Personal") == ["123"]
+    index.close()
+
+
+def test_import_again_replaces_the_names_of_a_cluster(tmp_path):
+    index_path = str(tmp_path / "index.sqlite")
+    import_dump(write(tmp_path / "old.gz", cluster("123", "Hinrichs, Erhard", "Hinrichs, E.")), index_path)
+    assert import_dump(write(tmp_path / "new.gz", "\n".join([cluster("123", "Hinrichs, Erhard"),
+                                                              cluster("123", "Hinrichs, Erhard")])), index_path) == 1
+    index = ViafIndex(index_path)
+    assert index.lookup("Erhard Hinrichs", "Personal") == ["123"]
+    assert index.lookup("E. Hinrichs", "Personal") == []
+    assert index._connection.execute("SELECT COUNT(*) FROM names").fetchone() == (1,)
+    index.close()
+
+
+def test_clusters_without_a_numeric_id_are_skipped(tmp_path):
+    dump = write(tmp_path / "clusters.gz", "\n".join([cluster("none", "Hinrichs, Erhard"),
+                                                      cluster("456", "Trippel, Thorsten")]))
+    assert import_dump(dump, str(tmp_path / "index.sqlite")) == 1
+
+
+def test_alternative_names_without_trailing_punctuation(tmp_path):
+    dump = write(tmp_path / "clusters.gz", "\n".join([
+        cluster("123", "Hinrichs, Erhard W., 1953-", alternatives=["Hinrichs, Erhard,"]),
+        cluster("456", "Universität Tübingen", alternatives=["Eberhard Karls Universität,"], name_type="Corporate")]))
+    index_path = str(tmp_path / "index.sqlite")
+    import_dump(dump, index_path)
+    index = ViafIndex(index_path)
+    assert index.lookup("Erhard Hinrichs", "Personal") == ["123"]
+    assert index.lookup("Eberhard Karls Universität", "Corporate") == ["456"]
+    index.close()
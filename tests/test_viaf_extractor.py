@@ -0,0 +1,109 @@
+import json
+import os
+import pickle
+import sys
+
+import pytest
+
+import viaf_extractor
+from conftest import REPOSITORY_DIR
+from viaf_dump import import_dump, ViafIndex
+from viaf_extractor import (Candidate, candidates_from_tuples, candidates_to_tuples, clear_information_cache,
+                            extract_viaf_id_offline, fetch_information)
+
+INFORMATION = ("1953", ("https://de.wikipedia.org/wiki/Erhard_Hinrichs",), frozenset(["DE"]))
+
+
+@pytest.fixture
+def requested_ids(monkeypatch):
+    """Answers every ID except 'broken', records the requested IDs"""
+    requested = []
+
+    def request_information(viaf_id):
+        requested.append(viaf_id)
+        if viaf_id == "broken":
+            raise ValueError("invalid answer for %s" % viaf_id)
+        return INFORMATION
+
+    clear_information_cache()
+    monkeypatch.setattr(viaf_extractor, "get_viaf_index", lambda: None)
+    monkeypatch.setattr(viaf_extractor, "_request_information", request_information)
+    yield requested
+    clear_information_cache()
+
+
+def test_a_failed_id_does_not_affect_the_batch(requested_ids):
+    fetched = fetch_information(["123", "broken", "456"])
+    assert fetched["123"] == fetched["456"] == INFORMATION
+    assert isinstance(fetched["broken"], ValueError)
+    # only the failed ID is requested again
+    fetch_information(["123", "broken", "456"])
+    assert sorted(requested_ids) == ["123", "456", "broken", "broken"]
+
+
+def test_only_the_candidate_whose_fetch_failed_raises(requested_ids):
+    batch = ["123", "broken"]
+    valid, broken = Candidate("123", "Erhard Hinrichs", batch=batch), Candidate("broken", "Erhard Hinrichs",
+                                                                                 batch=batch)
+    assert valid.birthyear == "1953"
+    with pytest.raises(ValueError):
+        broken.birthyear
+    with pytest.raises(ValueError):
+        viaf_extractor.extract_information("broken")
+
+
+def test_offline_lookup_does_not_shorten_names(tmp_path):
+    dump = tmp_path / "clusters.tsv"
+    dump.write_text("viaf_id\tname_type\theadings\n123\tPersonal\tHinrich, Marie\n456\tPersonal\tKüh\n",
+                    encoding="utf-8")
+    import_dump(str(dump), str(tmp_path / "index.sqlite"))
+    index = ViafIndex(str(tmp_path / "index.sqlite"))
+    assert extract_viaf_id_offline("Marie Hinrichs", "Personal", index) == []
+    assert extract_viaf_id_offline("Kühn", "Personal", index) == []
+    assert [c.viaf_id for c in extract_viaf_id_offline("Marie Hinrich.", "Personal", index)] == ["123"]
+    index.close()
+
+
+def test_online_candidates_are_unique(tmp_path, monkeypatch):
+    sys.path.insert(0, os.path.join(REPOSITORY_DIR, "benchmarks"))
+    from viaf_stub import StubVIAFServer, response_key
+
+    os.makedirs(str(tmp_path / "autosuggest"))
+    (tmp_path / "autosuggest" / (response_key("Erhard Hinrichs") + ".json")).write_text(json.dumps({"result": [
+        {"term": "Hinrichs, Erhard", "viafid": "123", "nametype": "personal"},
+        {"term": "Hinrichs, Erhard, 1953-", "viafid": "123", "nametype": "personal"},
+        {"term": "Hinrichs, Erhard W.", "viafid": "456", "nametype": "personal"}]}), encoding="utf-8")
+    server = StubVIAFServer(("127.0.0.1", 0), str(tmp_path)).start()
+    monkeypatch.setattr(viaf_extractor, "VIAF_URL", server.url)
+    try:
+        candidates = viaf_extractor.extract_viaf_id_online("Erhard Hinrichs", "Personal")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [c.viaf_id for c in candidates] == ["123"]
+
+
+def test_candidates_with_the_same_id_are_equal():
+    assert Candidate("1", "a") == Candidate("1", "b")
+    assert len({Candidate("1", "a"), Candidate("1", "b")}) == 1
+    assert Candidate("1", "a") != Candidate("2", "a")
+
+
+def test_unfetched_candidates_are_pickled_with_their_batch():
+    candidate = pickle.loads(pickle.dumps(Candidate("123", "Erhard Hinrichs", batch=["123", "456"])))
+    assert candidate.to_tuple() == ("123", "Erhard Hinrichs")
+    assert candidate.batch == ["123", "456"]
+
+
+def test_fetched_candidates_keep_their_information():
+    birthyear, wiki_links, nation = INFORMATION
+    candidate = Candidate("123", "Erhard Hinrichs", birthyear, wiki_links, nation)
+    for copy in [pickle.loads(pickle.dumps(candidate)), Candidate.from_tuple(candidate.to_tuple())]:
+        assert (copy.birthyear, copy.wiki_links, copy.nation) == INFORMATION
+
+
+def test_candidates_from_tuples_share_a_batch():
+    candidates = candidates_from_tuples([("123", "Erhard Hinrichs"), ("456", "Erhard Hinrichs")])
+    assert [c.viaf_id for c in candidates] == ["123", "456"]
+    assert candidates[0].batch == candidates[1].batch == ["123", "456"]
+    assert candidates_to_tuples(candidates) == [("123", "Erhard Hinrichs"), ("456", "Erhard Hinrichs")]